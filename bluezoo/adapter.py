@@ -2,6 +2,7 @@
 # SPDX-License-Identifier: GPL-2.0-only
 
 import asyncio
+import contextlib
 from enum import StrEnum
 from typing import Any
 
@@ -14,8 +15,9 @@ from .gatt import GattManager
 from .interfaces.Adapter import AdapterInterface
 from .log import logger
 from .media import MediaManager
-from .utils import (BluetoothClass, BluetoothUUID, NoneTask, create_background_task,
-                    dbus_method_async_except_logging, dbus_property_async_except_logging)
+from .storage import DeviceInfo
+from .utils import (BluetoothAddress, BluetoothClass, BluetoothUUID, DBusServerMixin, NoneTask,
+                    create_background_task, service_watcher)
 
 # List of predefined device names.
 TEST_NAMES = (
@@ -28,7 +30,7 @@ TEST_NAMES = (
 )
 
 
-class Adapter(AdapterInterface):
+class Adapter(DBusServerMixin, AdapterInterface):
 
     class PowerStateValue(StrEnum):
         On = "on"
@@ -37,7 +39,8 @@ class Adapter(AdapterInterface):
         OnDisabling = "on-disabling"
         OffBlocked = "off-blocked"
 
-    def __init__(self, mock, id: int, address: str):
+    def __init__(self, mock, id: int, address: str | BluetoothAddress,
+                 stored_devices: dict[str, DeviceInfo] | None = None):
         super().__init__()
         self.mock = mock
 
@@ -46,7 +49,8 @@ class Adapter(AdapterInterface):
         self.media = MediaManager(self)
 
         self.id = id
-        self.address = address
+        self.object_path = f"/org/bluez/hci{id}"
+        self.address = BluetoothAddress(address)
         self.name_ = TEST_NAMES[id % len(TEST_NAMES)]
         self.class_ = BluetoothClass(BluetoothClass.Major.Computer)
         self.powered = False
@@ -61,7 +65,7 @@ class Adapter(AdapterInterface):
         self.discovering_task = NoneTask()
         self.uuids: list[str] = []
 
-        self.scan_subscribers: dict[str, events.EventSubscriber] = {}
+        self.scan_subscribers: dict[str, events.Subscriber] = {}
         self.scan_filter_uuids: list[str] = []
         self.scan_filter_transport = "auto"
         self.scan_filter_duplicate = False
@@ -69,6 +73,11 @@ class Adapter(AdapterInterface):
         self.scan_filter_pattern = None
 
         self.devices: dict[str, Device] = {}
+        # Pairing and trust state of devices loaded from the persistent storage.
+        self.stored_devices: dict[BluetoothAddress, DeviceInfo] = {}
+        for device, info in (stored_devices or {}).items():
+            with contextlib.suppress(ValueError):  # Skip non-address entries.
+                self.stored_devices[BluetoothAddress(device)] = info
 
     def __str__(self):
         return f"adapter[{self.id}][{self.address}]"
@@ -82,7 +91,7 @@ class Adapter(AdapterInterface):
         self.discovering_task.cancel()
 
     def get_object_path(self):
-        return f"/org/bluez/hci{self.id}"
+        return self.object_path
 
     def get_interfaces(self):
         return (self, self.adv, self.gatt, self.media)
@@ -96,9 +105,7 @@ class Adapter(AdapterInterface):
         self.name__ = value
 
     async def update_uuids(self):
-        uuids = set()
-        uuids.update(self.gatt.get_primary_services())
-        await self.UUIDs.set_async(list(uuids))
+        await self.UUIDs.set_async(list(self.gatt.get_primary_services()))
 
     async def add_device(self, device: Device):
         """Add (or update) a device to the adapter."""
@@ -111,14 +118,17 @@ class Adapter(AdapterInterface):
             return
 
         logger.info("Adding %s to %s", device, self)
+        if (info := self.stored_devices.get(device.address)) is not None:
+            # Restore the state of a known device.
+            for x in DeviceInfo.ATTRIBUTES:
+                setattr(device, x, getattr(device, x) or getattr(info, x))
+        device.store()
         self.mock.export_object(path, device)
         self.devices[path] = device
 
-        uuids = set()
-        uuids.update(self.gatt.get_autoconnect_services())
         # Check if the new device has any service that is marked
         # for automatic connection, and connect to it if so.
-        if uuids.intersection(device.uuids):
+        if not self.gatt.get_autoconnect_services().isdisjoint(device.uuids):
             logger.info("Auto-connecting to %s on %s", device, self)
             await device.connect()
 
@@ -135,33 +145,35 @@ class Adapter(AdapterInterface):
         await self.Discovering.set_async(False)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def StartDiscovery(self) -> None:
         sender = sdbus.get_current_message().sender
         logger.info("Starting discovery on %s", self)
         assert sender is not None, "D-Bus message sender is None"
 
-        async def on_sender_lost():
+        async def on_sender_lost(_: events.ServiceLost):
             self.scan_subscribers.pop(sender, None)
             if not self.scan_subscribers:
                 await self.__stop_discovering()
-        self.scan_subscribers[sender] = events.subscribe(f"service:lost:{sender}",
+        if subscriber := self.scan_subscribers.pop(sender, None):
+            subscriber.unsubscribe()
+        else:
+            service_watcher.watch(sender)
+        self.scan_subscribers[sender] = events.subscribe(events.ServiceLost, sender,
                                                          on_sender_lost, once=True)
 
         self.discovering_task = self.mock.create_discovering_task(self.id)
         await self.Discovering.set_async(True)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def StopDiscovery(self) -> None:
         sender = sdbus.get_current_message().sender
         assert sender is not None, "D-Bus message sender is None"
         if subscriber := self.scan_subscribers.pop(sender, None):
             subscriber.unsubscribe()
+            service_watcher.unwatch(sender)
         await self.__stop_discovering()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def SetDiscoveryFilter(self, properties: dict[str, tuple[str, Any]]) -> None:
         if value := properties.get("UUIDs"):
             self.scan_filter_uuids = [BluetoothUUID(x) for x in value[1]]
@@ -175,35 +187,33 @@ class Adapter(AdapterInterface):
             self.scan_filter_pattern = value[1]
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def GetDiscoveryFilters(self) -> list[str]:
         return ["UUIDs", "RSSI", "Pathloss", "Transport", "DuplicateData",
                 "Discoverable", "Pattern"]
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RemoveDevice(self, device: str) -> None:
         if device not in self.devices:
             return
-        await self.del_device(self.devices[device])
+        device = self.devices[device]
+        await self.del_device(device)
+        # Forget about the device, so it will not be restored.
+        if self.stored_devices.pop(device.address, None) is not None:
+            self.mock.storage.save_device(str(self.address), str(device.address), None)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Address(self) -> str:
-        return self.address
+        return str(self.address)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def AddressType(self) -> str:
         return "public"
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Name(self) -> str:
         return self.name_
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Alias(self) -> str:
         return self.name
 
@@ -212,33 +222,33 @@ class Adapter(AdapterInterface):
         self.name = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Class(self) -> int:
         return self.class_
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Powered(self) -> bool:
         return self.powered
 
     @Powered.setter
     def Powered_setter(self, value: bool):
 
+        # Power state transitions are emitted without coalescing,
+        # so clients can observe the intermediate states.
+
         async def off():
-            await self.PowerState.set_async(Adapter.PowerStateValue.OnDisabling)
-            await self.PowerState.set_async(Adapter.PowerStateValue.Off)
+            await self.PowerState.set_async(Adapter.PowerStateValue.OnDisabling, coalesce=False)
+            await self.PowerState.set_async(Adapter.PowerStateValue.Off, coalesce=False)
             await self.__stop_discovering()
 
         async def on():
-            await self.PowerState.set_async(Adapter.PowerStateValue.OffEnabling)
-            await self.PowerState.set_async(Adapter.PowerStateValue.On)
+            await self.PowerState.set_async(Adapter.PowerStateValue.OffEnabling, coalesce=False)
+            await self.PowerState.set_async(Adapter.PowerStateValue.On, coalesce=False)
 
         if self.powered != value:
             create_background_task(on() if value else off())
             self.powered = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def PowerState(self) -> str:
         if self.powered:
             return Adapter.PowerStateValue.On
@@ -249,7 +259,6 @@ class Adapter(AdapterInterface):
         pass
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Connectable(self) -> bool:
         return self.connectable
 
@@ -272,7 +281,6 @@ class Adapter(AdapterInterface):
                 self.discoverable_task = asyncio.create_task(task())
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Discoverable(self) -> bool:
         return self.discoverable
 
@@ -282,7 +290,6 @@ class Adapter(AdapterInterface):
         self.__setup_discoverable_timeout()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def DiscoverableTimeout(self) -> int:
         return self.discoverable_timeout
 
@@ -304,7 +311,6 @@ class Adapter(AdapterInterface):
                 self.pairable_task = asyncio.create_task(task())
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Pairable(self) -> bool:
         return self.pairable
 
@@ -314,7 +320,6 @@ class Adapter(AdapterInterface):
         self.__setup_pairable_timeout()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def PairableTimeout(self) -> int:
         return self.pairable_timeout
 
@@ -324,7 +329,6 @@ class Adapter(AdapterInterface):
         self.__setup_pairable_timeout()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Discovering(self) -> bool:
         return self.discovering
 
@@ -333,7 +337,6 @@ class Adapter(AdapterInterface):
         self.discovering = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def UUIDs(self) -> list[str]:
         return self.uuids
 
@@ -342,26 +345,21 @@ class Adapter(AdapterInterface):
         self.uuids = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Modalias(self) -> str:
         return "usb:v1D6Bp0246d0537"
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Roles(self) -> list[str]:
         return ["central", "peripheral", "central-peripheral"]
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def ExperimentalFeatures(self) -> list[str]:
         return []
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Manufacturer(self) -> int:
         return 0x05F1
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Version(self) -> int:
         return 0x06
@@ -9,8 +9,7 @@ from ..exceptions import DBusBluezDoesNotExistError, DBusBluezNotPermittedError
 from ..interfaces.LEAdvertisement import LEAdvertisementInterface
 from ..interfaces.LEAdvertisingManager import LEAdvertisingManagerInterface
 from ..log import logger
-from ..utils import (DBusClientMixin, dbus_method_async_except_logging,
-                     dbus_property_async_except_logging)
+from ..utils import DBusClientMixin, DBusServerMixin
 
 
 class LEAdvertisementClient(DBusClientMixin, LEAdvertisementInterface):
@@ -25,7 +24,7 @@ class LEAdvertisementClient(DBusClientMixin, LEAdvertisementInterface):
         return f"advertisement[{options}]"
 
 
-class LEAdvertisingManager(LEAdvertisingManagerInterface):
+class LEAdvertisingManager(DBusServerMixin, LEAdvertisingManagerInterface):
     """Bluetooth Low Energy (BLE) advertising manager."""
 
     # Number of supported advertisement instances per adapter.
@@ -54,7 +53,6 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         await self.SupportedInstances.set_async(self.__supported_instances)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RegisterAdvertisement(self, path: str,
                                     options: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
@@ -78,7 +76,6 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         await self.SupportedInstances.set_async(self.__supported_instances)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def UnregisterAdvertisement(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to unregister advertisement %s", sender, path)
@@ -90,7 +87,6 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         raise DBusBluezDoesNotExistError(msg)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def ActiveInstances(self) -> int:
         return len(self.advertisements)
 
@@ -99,7 +95,6 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         pass
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedInstances(self) -> int:
         return self.__supported_instances
 
@@ -108,17 +103,14 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         pass
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedIncludes(self) -> list[str]:
         return ["tx-power", "appearance", "local-name"]
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedSecondaryChannels(self) -> list[str]:
         return ["1M"]
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedCapabilities(self) -> dict[str, tuple[str, Any]]:
         caps = {}
         caps["MaxAdvLen"] = ("y", 31)
@@ -126,6 +118,5 @@ class LEAdvertisingManager(LEAdvertisingManagerInterface):
         return caps
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedFeatures(self) -> list[str]:
         return []
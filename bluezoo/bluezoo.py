@@ -6,32 +6,32 @@ import logging
 import re
 import signal
 from argparse import ArgumentParser
+from collections.abc import Iterable
 from typing import Any, Literal
 
 import sdbus
 from sdbus.dbus_proxy_async_interface_base import DbusExportHandle
-from sdbus_async.dbus_daemon import FreedesktopDbus
 
-from . import events
 from .adapter import Adapter
 from .controller import BlueZooController
 from .device import Device
 from .log import logger
 from .root import RootManager
-from .utils import BluetoothAddress, BluetoothUUID, setup_default_bus
+from .storage import Storage
+from .utils import (BluetoothAddress, BluetoothUUID, properties_changed_coalescer,
+                    properties_snapshot, service_watcher, setup_default_bus)
 
 
 class BluezMockService:
 
-    def __init__(self, adapter_auto_enable: bool, scan_interval: int):
+    def __init__(self, adapter_auto_enable: bool, scan_interval: int, gatt_concurrency: int,
+                 storage: Storage | None = None):
 
         # Keep track of exported objects to D-Bus.
         self._exports: dict[Any, DbusExportHandle] = {}
 
-        # Proxy for the D-Bus daemon interface used
-        # for listening to ownership changes.
-        self.dbus = FreedesktopDbus()
-        self._dbus_task = asyncio.create_task(self._service_lost_task())
+        # Watch services with live registrations for disconnection.
+        service_watcher.start()
 
         # Register dedicated BlueZoo controller interface.
         self.bluezoo = BlueZooController(self)
@@ -46,36 +46,79 @@ class BluezMockService:
         self.adapters: dict[int, Adapter] = {}
         self.adapter_auto_enable = adapter_auto_enable
         self.scan_interval = scan_interval
+        self.gatt_concurrency = gatt_concurrency
+        self.storage = storage
 
     async def cleanup(self):
         for id in list(self.adapters):
             await self.del_adapter(id)
         self.remove_object(self.root)
+        await self.root.cleanup()
         self._exports.pop(self.manager).stop()
         self._exports.pop(self.bluezoo).stop()
-        self._dbus_task.cancel()
+        if self.storage is not None:
+            await self.storage.flush()
+        await service_watcher.stop()
 
-    async def _service_lost_task(self):
-        async for _, old, new in self.dbus.name_owner_changed.catch():
-            if old and not new:
-                logger.debug("D-Bus service %s lost", old)
-                events.emit(f"service:lost:{old}")
+    def export_objects(self, objects: Iterable[tuple[str, Any]]):
+        """Export the objects (given as path and object pairs) to D-Bus.
+
+        All objects are exported before the ObjectManager is notified, so
+        interfaces sharing the same object path are announced with a single
+        InterfacesAdded signal. Signals are emitted in the given order, so
+        parents should be given before their children.
+        """
+        paths: dict[str, None] = {}
+        for path, obj in objects:
+            self._exports[obj] = obj.export_to_dbus(path)
+            properties_snapshot.invalidate(obj)
+            paths[path] = None
+        bus = sdbus.get_default_bus()
+        for path in paths:
+            bus.emit_object_added(path)
 
     def export_object(self, path: str, obj):
         """Export the object to D-Bus."""
-        handle = self.manager.export_with_manager(path, obj)
-        self._exports[obj] = handle
+        self.export_objects(((path, obj),))
+
+    def remove_objects(self, objects: Iterable[Any]):
+        """Remove the objects from D-Bus.
+
+        The ObjectManager is notified before the objects are unexported, with
+        a single InterfacesRemoved signal for every object path. Signals are
+        emitted in the reverse order, so children are removed before parents.
+        """
+        objects = list(objects)
+        paths: dict[str, None] = {}
+        for obj in objects:
+            # Emit pending property changes while the object is still exported.
+            properties_changed_coalescer.flush(obj)
+            paths[obj._dbus.serving_object_path] = None
+        bus = sdbus.get_default_bus()
+        for path in reversed(paths):
+            bus.emit_object_removed(path)
+        for obj in objects:
+            self._exports.pop(obj).stop()
+            properties_snapshot.invalidate(obj)
 
     def remove_object(self, obj):
         """Remove the object from D-Bus."""
-        handle = self._exports.pop(obj)
-        handle.stop()
-
-    async def add_adapter(self, id: int, address: str):
-        adapter = Adapter(self, id, address)
+        self.remove_objects((obj,))
+
+    async def add_adapter(self, id: int, address: str | BluetoothAddress):
+        address = BluetoothAddress(address)
+        stored_devices = None
+        if self.storage is not None:
+            stored_devices = await self.storage.load_devices(str(address))
+        adapter = Adapter(self, id, address, stored_devices)
         logger.info("Adding %s", adapter)
-        for interface in adapter.get_interfaces():
-            self.export_object(adapter.get_object_path(), interface)
+        self.export_objects((adapter.get_object_path(), x) for x in adapter.get_interfaces())
+        # Restore devices known from the persistent storage.
+        for peer in self.adapters.values():
+            if peer.address in adapter.stored_devices:
+                await adapter.add_device(Device(peer))
+            if adapter.address in peer.stored_devices:
+                await peer.add_device(Device(adapter))
         self.adapters[id] = adapter
         if self.adapter_auto_enable:
             await adapter.Powered.set_async(True)
@@ -86,8 +129,7 @@ class BluezMockService:
         logger.info("Removing %s", adapter)
         for device in list(adapter.devices.values()):
             await adapter.del_device(device)
-        for interface in adapter.get_interfaces():
-            self.remove_object(interface)
+        self.remove_objects(adapter.get_interfaces())
         await adapter.cleanup()
 
     def create_discovering_task(self, id: int):
@@ -164,13 +206,15 @@ class BluetoothAddressWithName:
 
 async def startup(bus: Literal["system", "session"] = "system",
                   adapters: list[BluetoothAddressWithName] = [],
-                  auto_enable: bool = False, scan_interval: int = 10):
+                  auto_enable: bool = False, scan_interval: int = 10,
+                  gatt_concurrency: int = 16, storage_dir: str | None = None):
 
     startup.bus = setup_default_bus(bus)
     await startup.bus.request_name_async("org.bluez", 0)
 
     logger.debug("Initializing BlueZ D-Bus Mock Service")
-    service = BluezMockService(auto_enable, scan_interval)
+    storage = Storage(storage_dir) if storage_dir else None
+    service = BluezMockService(auto_enable, scan_interval, gatt_concurrency, storage)
 
     for id, adapter in enumerate(adapters):
         a = await service.add_adapter(id, adapter.address)
@@ -205,6 +249,13 @@ def main():
     parser.add_argument(
         "--scan-interval", metavar="SECONDS", type=int, default=10,
         help="interval between scans; default is %(default)s seconds")
+    parser.add_argument(
+        "--gatt-concurrency", metavar="NUM", type=int, default=16,
+        help=("maximal number of concurrent D-Bus calls made while registering "
+              "GATT application; default is %(default)s"))
+    parser.add_argument(
+        "--storage-dir", metavar="PATH",
+        help="directory for persistent storage; default is no storage")
     parser.add_argument(
         "-a", "--adapter", metavar="ADDRESS[:NAME]", dest="adapters",
         action="append", type=BluetoothAddressWithName,
@@ -222,5 +273,7 @@ def main():
         adapters=args.adapters or [],
         auto_enable=args.auto_enable,
         scan_interval=args.scan_interval,
+        gatt_concurrency=args.gatt_concurrency,
+        storage_dir=args.storage_dir,
     ))
     loop.run_forever()
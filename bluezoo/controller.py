@@ -3,7 +3,7 @@
 
 import sdbus
 
-from .utils import dbus_method_async_except_logging
+from .utils import BluetoothAddress, DBusServerMixin
 
 
 class BlueZooAlreadyExistsError(sdbus.DbusFailedError):
@@ -14,7 +14,12 @@ class BlueZooDoesNotExistError(sdbus.DbusFailedError):
     dbus_error_name = "org.bluezoo.Error.DoesNotExist"
 
 
+class BlueZooInvalidArgumentsError(sdbus.DbusFailedError):
+    dbus_error_name = "org.bluezoo.Error.InvalidArguments"
+
+
 class BlueZooController(
+        DBusServerMixin,
         sdbus.DbusInterfaceCommonAsync,
         interface_name="org.bluezoo.Manager1"):
 
@@ -28,11 +33,15 @@ class BlueZooController(
         result_signature="o",
         result_args_names=["adapter"],
         flags=sdbus.DbusUnprivilegedFlag)
-    @dbus_method_async_except_logging
     async def AddAdapter(self, id: int, address: str) -> str:
         if id in self.mock.adapters:
             msg = "Already Exists"
             raise BlueZooAlreadyExistsError(msg)
+        try:
+            address = BluetoothAddress(address)
+        except ValueError as e:
+            msg = "Invalid Arguments"
+            raise BlueZooInvalidArgumentsError(msg) from e
         adapter = await self.mock.add_adapter(id, address)
         return adapter.get_object_path()
 
@@ -40,7 +49,6 @@ class BlueZooController(
         input_signature="y",
         input_args_names=["id"],
         flags=sdbus.DbusUnprivilegedFlag)
-    @dbus_method_async_except_logging
     async def RemoveAdapter(self, id: int):
         if id not in self.mock.adapters:
             msg = "Does Not Exist"
@@ -2,19 +2,21 @@
 # SPDX-License-Identifier: GPL-2.0-only
 
 import asyncio
+from collections.abc import Iterable
 from typing import Any
 
 import sdbus
 
-from .gatt import (GattCharacteristicClient, GattCharacteristicClientLink, GattDescriptorClient,
-                   GattDescriptorClientLink, GattProfileClient, GattServiceClient,
-                   GattServiceClientLink)
+from .gatt import (GattApplicationClient, GattCharacteristicClient, GattCharacteristicClientLink,
+                   GattDescriptorClient, GattDescriptorClientLink, GattPreparedWrites,
+                   GattServiceClient, GattServiceClientLink)
 from .interfaces.Device import DeviceInterface
 from .log import logger
-from .utils import NoneTask, dbus_method_async_except_logging, dbus_property_async_except_logging
+from .storage import DeviceInfo
+from .utils import DBusServerMixin, NoneTask
 
 
-class Device(DeviceInterface):
+class Device(DBusServerMixin, DeviceInterface):
     """Local adapter's view on a peer adapter."""
 
     PAIRING_TIMEOUT = 60
@@ -27,6 +29,7 @@ class Device(DeviceInterface):
 
         # The adapter to which this device is added.
         self.adapter = None
+        self.object_path = None
         # The device representing local adapter on the peer adapter.
         self.peer: Device = None
 
@@ -49,6 +52,13 @@ class Device(DeviceInterface):
         self.connecting_task = NoneTask()
         self.services = {}
         self.services_resolved = False
+        # Links of the peer's GATT applications exported while connected.
+        self.gatt_links: dict[GattApplicationClient, dict[str, Any]] = {}
+        # Resolved GATT attributes of the peer's applications reused across
+        # reconnects, so links can be created without resolving them again.
+        self.gatt_cache: dict[GattApplicationClient, list] = {}
+        # Reliable write queue of the GATT connection.
+        self.gatt_prepared_writes = GattPreparedWrites()
         self.manufacturer_data = {}
         self.service_data = {}
         self.advertising_flags = b""
@@ -73,11 +83,23 @@ class Device(DeviceInterface):
         """Set the adapter to which this device is added."""
         self.peer = Device(adapter)
         self.adapter = adapter
+        # The path does not change while the device is attached.
+        self.object_path = f"{adapter.get_object_path()}/dev_{self.address.path}"
+
+    def store(self):
+        """Save pairing and trust state of the device in the persistent storage."""
+        if self.adapter is None or (storage := self.adapter.mock.storage) is None:
+            return
+        info = DeviceInfo(self.name_, *(getattr(self, x) for x in DeviceInfo.ATTRIBUTES))
+        stored = self.adapter.stored_devices.get(self.address)
+        if stored is None and not any(getattr(self, x) for x in DeviceInfo.ATTRIBUTES):
+            return  # Do not store devices which were only discovered.
+        if stored != info:
+            self.adapter.stored_devices[self.address] = info
+            storage.save_device(str(self.adapter.address), str(self.address), info)
 
     def get_object_path(self):
-        return "/".join((
-            self.adapter.get_object_path(),
-            f"dev_{self.address.replace(':', '_')}"))
+        return self.object_path
 
     @property
     def name(self):
@@ -108,6 +130,113 @@ class Device(DeviceInterface):
         # our adapter is trusted on the peer adapter.
         return self.is_br_edr and not self.peer.trusted
 
+    def __resolve_links(self, objects, links: dict) -> list:
+        """Resolve parents of the given GATT attributes.
+
+        Services are resolved first, then characteristics and descriptors, so
+        parent links are created before their children regardless of the
+        handle layout (the server might give a child a lower handle than its
+        parent). Within every level, attributes are resolved in the given
+        order. Parents are looked up in the links dictionary (indexed by the
+        client's object path) and among the attributes resolved so far.
+        Returns the list of (link class, attribute, parent's path) tuples.
+        """
+        objects = list(objects)
+        resolved = []
+        paths = set(links)
+        for obj in objects:
+            if isinstance(obj, GattServiceClient):
+                resolved.append((GattServiceClientLink, obj, None))
+                paths.add(obj.get_object_path())
+        for obj in objects:
+            if isinstance(obj, GattCharacteristicClient):
+                if (parent := obj.Service.get()) not in paths:
+                    logger.debug("Skipping orphaned GATT characteristic %s", obj.get_object_path())
+                    continue
+                resolved.append((GattCharacteristicClientLink, obj, parent))
+                paths.add(obj.get_object_path())
+        for obj in objects:
+            if isinstance(obj, GattDescriptorClient):
+                if (parent := obj.Characteristic.get()) not in paths:
+                    logger.debug("Skipping orphaned GATT descriptor %s", obj.get_object_path())
+                    continue
+                resolved.append((GattDescriptorClientLink, obj, parent))
+        return resolved
+
+    def __create_links(self, resolved: list, links: dict) -> list:
+        """Create links for the resolved GATT attributes.
+
+        Created links are added to the links dictionary and returned in the
+        order of creation.
+        """
+        created = []
+        for cls, obj, parent in resolved:
+            link = cls(obj, self if parent is None else links[parent])
+            links[obj.get_object_path()] = link
+            created.append(link)
+        return created
+
+    def __export_links(self, links: Iterable):
+        exported = {}
+        for link in links:
+            if (path := link.get_object_path()) in self.services:
+                continue  # Already exported.
+            exported[path] = link
+        # Export all links at once, so the manager can batch the signals.
+        self.peer_adapter.mock.export_objects(exported.items())
+        self.services.update(exported)
+
+    async def __remove_links(self, links: Iterable):
+        removed = []
+        for link in links:
+            await link.cleanup()
+            if self.services.pop(link.get_object_path(), None) is not None:
+                removed.append(link)
+        # Parents shall be given before their children.
+        removed.sort(key=lambda x: x.get_object_path().count("/"))
+        self.adapter.mock.remove_objects(removed)
+
+    async def update_services(self, app: GattApplicationClient):
+        """Update links after the GATT application has changed.
+
+        Links of removed attributes (together with links of all attributes
+        below them) are unexported and links for new attributes are exported,
+        while all other links are left intact.
+        """
+        # Attributes of the application have changed, so they have
+        # to be resolved again on the next connection.
+        self.gatt_cache.pop(app, None)
+        if (links := self.gatt_links.get(app)) is None:
+            return
+
+        def is_removed(link) -> bool:
+            if app.attributes.get(link.client.Handle.get()) is not link.client:
+                return True
+            if isinstance(link, GattCharacteristicClientLink):
+                return is_removed(link.service)
+            if isinstance(link, GattDescriptorClientLink):
+                return is_removed(link.characteristic)
+            return False
+
+        removed = [links.pop(path) for path, link in list(links.items()) if is_removed(link)]
+        await self.__remove_links(removed)
+        linked = {link.client for link in links.values()}
+        resolved = self.__resolve_links((x for x in app.attributes if x not in linked), links)
+        self.__export_links(self.__create_links(resolved, links))
+
+    async def remove_services(self, app: GattApplicationClient):
+        """Remove links of the unregistered GATT application."""
+        self.gatt_cache.pop(app, None)
+        if (links := self.gatt_links.pop(app, None)) is not None:
+            await self.__remove_links(links.values())
+
+    async def __add_peer(self):
+        """Add the peer device to the peer adapter (or update the existing one)."""
+        await self.peer_adapter.add_device(self.peer)
+        # The peer adapter might have already known our adapter (e.g. from
+        # the discovery), so the state has to be set on the exported device.
+        self.peer = self.peer_adapter.devices[self.peer.get_object_path()]
+
     async def connect(self, uuid: str | None = None) -> None:
 
         async def task():
@@ -118,34 +247,26 @@ class Device(DeviceInterface):
                 await self.peer_adapter.mock.root.agent.RequestAuthorization(
                     self.get_object_path())
 
-            # Mark devices as connected.
-            await self.peer.Connected.set_async(True)
-            await self.Connected.set_async(True)
+            # Mark devices as connected. Connection state changes are not
+            # coalesced, so clients see them in order with the services.
+            await self.peer.Connected.set_async(True, coalesce=False)
+            await self.Connected.set_async(True, coalesce=False)
 
             # Resolve LE services on the device.
             for app in self.peer_adapter.gatt.apps.values():
-                links = {}
-                for obj_path, obj in sorted(app.objects.items(), key=lambda x: x[0]):
-                    if isinstance(obj, GattProfileClient):
-                        continue
-                    if isinstance(obj, GattServiceClient):
-                        link = GattServiceClientLink(obj, self)
-                    elif isinstance(obj, GattCharacteristicClient):
-                        link = GattCharacteristicClientLink(obj, links[obj.Service.get()])
-                    elif isinstance(obj, GattDescriptorClient):
-                        link = GattDescriptorClientLink(obj, links[obj.Characteristic.get()])
-                    # Export the link with the manager.
-                    self.peer_adapter.mock.export_object(link.get_object_path(), link)
-                    self.services[link.get_object_path()] = link
-                    links[obj_path] = link
+                if (resolved := self.gatt_cache.get(app)) is None:
+                    resolved = self.__resolve_links(app.attributes, {})
+                    self.gatt_cache[app] = resolved
+                links = self.gatt_links[app] = {}
+                self.__export_links(self.__create_links(resolved, links))
 
             # Devices are linked, so we can mark services as resolved.
-            await self.peer.ServicesResolved.set_async(True)
-            await self.ServicesResolved.set_async(True)
+            await self.peer.ServicesResolved.set_async(True, coalesce=False)
+            await self.ServicesResolved.set_async(True, coalesce=False)
 
         if self.connect_check_pairing_required(uuid):
             await self.pair()
-        await self.peer_adapter.add_device(self.peer)
+        await self.__add_peer()
 
         try:
             self.connecting_task = asyncio.create_task(task())
@@ -157,8 +278,19 @@ class Device(DeviceInterface):
     async def disconnect(self, uuid: str | None = None) -> None:
         self.connecting_task.cancel()
         logger.info("Disconnecting %s", self)
-        await self.peer.Connected.set_async(False)
-        await self.Connected.set_async(False)
+        await self.peer.Connected.set_async(False, coalesce=False)
+        await self.Connected.set_async(False, coalesce=False)
+
+        # Remove services from the D-Bus. New links are created on the next
+        # connection from the attributes resolved on this connection.
+        for link in self.services.values():
+            await link.cleanup()
+        self.adapter.mock.remove_objects(self.services.values())
+        self.services.clear()
+        self.gatt_links.clear()
+        if self.services_resolved:
+            await self.peer.ServicesResolved.set_async(False, coalesce=False)
+            await self.ServicesResolved.set_async(False, coalesce=False)
 
     async def pair(self) -> None:
 
@@ -171,12 +303,14 @@ class Device(DeviceInterface):
             else:
                 raise NotImplementedError
             # Add paired peer device to our adapter.
-            self.peer.paired = True
-            self.peer.bonded = True
-            await self.peer_adapter.add_device(self.peer)
+            await self.__add_peer()
+            # Pairing state changes are not coalesced, so clients see
+            # them before the reply to the pairing request.
+            await self.peer.Paired.set_async(True, coalesce=False)
+            await self.peer.Bonded.set_async(True, coalesce=False)
             # Mark the device as paired and bonded.
-            await self.Paired.set_async(True)
-            await self.Bonded.set_async(True)
+            await self.Paired.set_async(True, coalesce=False)
+            await self.Bonded.set_async(True, coalesce=False)
 
         try:
             self.pairing_task = asyncio.create_task(task())
@@ -186,54 +320,44 @@ class Device(DeviceInterface):
             logger.info("Pairing with %s timed out", self)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def Connect(self) -> None:
         await self.connect()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def Disconnect(self) -> None:
         await self.disconnect()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def ConnectProfile(self, uuid: str) -> None:
         await self.connect(uuid)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def DisconnectProfile(self, uuid: str) -> None:
         await self.disconnect(uuid)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def Pair(self) -> None:
         await self.pair()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def CancelPairing(self) -> None:
         if not self.pairing_task.done():
             logger.info("Canceling pairing with %s", self)
         self.pairing_task.cancel()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def GetServiceRecords(self) -> list[bytes]:
         return []
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Address(self) -> str:
-        return self.address
+        return str(self.address)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def AddressType(self) -> str:
         return "public"
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Name(self) -> str:
         return self.name_
 
@@ -242,12 +366,10 @@ class Device(DeviceInterface):
         self.name_ = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Icon(self) -> str:
         return self.icon
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Alias(self) -> str:
         return self.name
 
@@ -256,12 +378,10 @@ class Device(DeviceInterface):
         self.name = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Class(self) -> int:
         return self.class_
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Appearance(self) -> int:
         return self.appearance
 
@@ -270,7 +390,6 @@ class Device(DeviceInterface):
         self.appearance = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def UUIDs(self) -> list[str]:
         return self.uuids
 
@@ -279,43 +398,42 @@ class Device(DeviceInterface):
         self.uuids = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Paired(self) -> bool:
         return self.paired
 
     @Paired.setter_private
     def Paired_setter(self, value):
         self.paired = value
+        self.store()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Bonded(self) -> bool:
         return self.bonded
 
     @Bonded.setter_private
     def Bonded_setter(self, value):
-        self.bond = value
+        self.bonded = value
+        self.store()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Trusted(self) -> bool:
         return self.trusted
 
     @Trusted.setter
     def Trusted_setter(self, value):
         self.trusted = value
+        self.store()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Blocked(self) -> bool:
         return self.blocked
 
     @Blocked.setter
     def Blocked_setter(self, value):
         self.blocked = value
+        self.store()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def WakeAllowed(self) -> bool:
         return self.wake_allowed
 
@@ -324,7 +442,6 @@ class Device(DeviceInterface):
         self.wake_allowed = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Connected(self) -> bool:
         return self.connected
 
@@ -333,37 +450,30 @@ class Device(DeviceInterface):
         self.connected = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Adapter(self) -> str:
         return self.adapter.get_object_path()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def LegacyPairing(self) -> bool:
         return False
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def CablePairing(self) -> bool:
         return False
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Modalias(self) -> str:
         return "usb:v1D6Bp0246d0537"
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def RSSI(self) -> int:
         return self.rssi
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def TxPower(self) -> int:
         return self.tx_power or 0
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def ManufacturerData(self) -> dict[str, tuple[str, object]]:
         return self.manufacturer_data
 
@@ -372,7 +482,6 @@ class Device(DeviceInterface):
         self.manufacturer_data = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def ServiceData(self) -> dict[str, tuple[str, Any]]:
         return self.service_data
 
@@ -381,7 +490,6 @@ class Device(DeviceInterface):
         self.service_data = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def ServicesResolved(self) -> bool:
         return self.services_resolved
 
@@ -390,17 +498,14 @@ class Device(DeviceInterface):
         self.services_resolved = value
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def AdvertisingFlags(self) -> bytes:
         return self.advertising_flags
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def AdvertisingData(self) -> dict[str, tuple[str, object]]:
         return self.advertising_data
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def PreferredBearer(self) -> str:
         return self.bearer
 
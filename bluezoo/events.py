@@ -1,27 +1,121 @@
 # SPDX-FileCopyrightText: 2025 BlueZoo developers
 # SPDX-License-Identifier: GPL-2.0-only
 
-from pyventus.events import AsyncIOEventEmitter, EventLinker, EventSubscriber
+import asyncio
+import inspect
+import weakref
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
 
+from .log import logger
 
-class Subscription:
-    """Convenience wrapper for EventSubscriber."""
 
-    def __init__(self, subscriber: EventSubscriber | None = None):
-        self.subscriber = subscriber
+class Event:
+    """Base class for events.
+
+    Subscribers are indexed by the event class and the event key (e.g. the
+    D-Bus service name), so an event is delivered only to subscribers which
+    are interested in that particular key.
+    """
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: Hashable):
+        self.key = key
+
+
+class ServiceLost(Event):
+    """D-Bus service has disconnected from the bus."""
+
+    __slots__ = ()
+
+    @property
+    def service(self) -> str:
+        return self.key
+
+
+class PropertiesChanged(Event):
+    """Properties of a remote D-Bus object have changed.
+
+    The event key is the identity of the object (see the id function), so
+    subscriptions do not keep the object alive.
+    """
+
+    __slots__ = ("properties",)
+
+    def __init__(self, obj: Any, properties: dict[str, Any]):
+        super().__init__(id(obj))
+        self.properties = properties
+
+
+E = TypeVar("E", bound=Event)
+
+
+class Subscriber:
+    """Subscription of the callback for events of given class and key."""
+
+    __slots__ = ("callback", "index", "once", "weak")
+
+    def __init__(self, index: tuple[type[Event], Hashable], callback: Callable,
+                 once: bool, weak: bool):
+        self.index = index
+        self.once = once
+        self.weak = weak
+        if not weak:
+            self.callback = callback
+        elif inspect.ismethod(callback):
+            self.callback = weakref.WeakMethod(callback)
+        else:
+            self.callback = weakref.ref(callback)
 
     def unsubscribe(self):
-        if self.subscriber:
-            self.subscriber.unsubscribe()
-            self.subscriber = None
+        if (subscribers := _subscribers.get(self.index)) and self in subscribers:
+            subscribers.remove(self)
+            if not subscribers:
+                del _subscribers[self.index]
+
+
+# Subscribers indexed by the event class and the event key.
+_subscribers: dict[tuple[type[Event], Hashable], list[Subscriber]] = {}
+# Tasks of asynchronous callbacks which are still running.
+_tasks: set[asyncio.Task] = set()
 
 
-emitter = AsyncIOEventEmitter()
+def emit(event: Event):
+    """Deliver the event to all subscribers.
 
+    Callbacks are called synchronously. If a callback returns an awaitable
+    (i.e. it is a coroutine function), the awaitable is scheduled as a task.
+    Exceptions raised by a callback are logged, so the event is delivered
+    to all other subscribers.
+    """
+    if (subscribers := _subscribers.get((type(event), event.key))) is None:
+        return
+    for subscriber in tuple(subscribers):
+        callback = subscriber.callback
+        if subscriber.weak and (callback := callback()) is None:
+            # The subscribed object has been garbage collected.
+            subscriber.unsubscribe()
+            continue
+        if subscriber.once:
+            subscriber.unsubscribe()
+        try:
+            if inspect.isawaitable(result := callback(event)):
+                task = asyncio.ensure_future(result)
+                _tasks.add(task)
+                task.add_done_callback(_tasks.discard)
+        except Exception:
+            logger.exception("Error in %s callback", type(event).__name__)
 
-def emit(event, **kwargs):
-    return emitter.emit(event, **kwargs)
 
+def subscribe(kind: type[E], key: Hashable, callback: Callable[[E], Any],
+              once: bool = False, weak: bool = False) -> Subscriber:
+    """Subscribe the callback for events of given class and key.
 
-def subscribe(event, callback, once: bool = False):
-    return EventLinker.subscribe(event, event_callback=callback, once=once)
+    With weak=True, the subscriber holds a weak reference to the callback
+    (or to the object of a bound method), so the subscription does not keep
+    the object alive and it is dropped once the object is collected.
+    """
+    subscriber = Subscriber((kind, key), callback, once, weak)
+    _subscribers.setdefault(subscriber.index, []).append(subscriber)
+    return subscriber
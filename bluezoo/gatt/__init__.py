@@ -5,6 +5,7 @@ from .application import GattApplicationClient
 from .characteristic import GattCharacteristicClient, GattCharacteristicClientLink
 from .descriptor import GattDescriptorClient, GattDescriptorClientLink
 from .manager import GattManager
+from .procedures import GattPreparedWrites
 from .profile import GattProfileClient
 from .service import GattServiceClient, GattServiceClientLink
 
@@ -15,6 +16,7 @@ __all__ = [
     "GattDescriptorClient",
     "GattDescriptorClientLink",
     "GattManager",
+    "GattPreparedWrites",
     "GattProfileClient",
     "GattServiceClient",
     "GattServiceClientLink",
@@ -4,31 +4,45 @@
 import asyncio
 
 import sdbus
-from sdbus.utils import parse_get_managed_objects
+from sdbus.utils import parse_get_managed_objects, parse_interfaces_added
 
 from ..log import logger
-from ..utils import DBusClientMixin, NoneTask
+from ..utils import BluetoothUUID, DBusClientMixin, NoneTask, map_with_concurrency
+from .handles import GattAttributeTable
 
 
 class GattApplicationClient(DBusClientMixin, sdbus.DbusObjectManagerInterfaceAsync):
     """D-Bus client for registered GATT application."""
 
-    def __init__(self, service, path, options, service_lost_callback):
+    def __init__(self, service, path, options, service_lost_callback,
+                 objects_changed_callback):
         super().__init__(service, path, service_lost_callback)
-        # Use service lost callback also in case of interface removed.
-        self.interfaces_removed_callback = service_lost_callback
+        # Callback called with lists of added and removed objects.
+        self.objects_changed_callback = objects_changed_callback
         self.options = options
 
         self.objects: dict[str, DBusClientMixin] = {}
+        # Objects with assigned handles ordered by the handle value.
+        self.attributes = GattAttributeTable()
+        # UUIDs of primary services and services marked for autoconnect.
+        self.primary_services: list[BluetoothUUID] = []
+        self.autoconnect_services: set[BluetoothUUID] = set()
+        self.interfaces_added_task = NoneTask()
         self.interfaces_removed_task = NoneTask()
 
     async def cleanup(self):
         for obj in self.objects.values():
             await obj.cleanup()
+        self.interfaces_added_task.cancel()
         self.interfaces_removed_task.cancel()
+        await super().cleanup()
 
-    async def object_manager_setup_sync_task(self, interfaces):
-        """Synchronize cached objects with the D-Bus service."""
+    async def object_manager_setup_sync_task(self, interfaces, concurrency: int = 1):
+        """Synchronize cached objects with the D-Bus service.
+
+        Properties of up to the given number of objects are synchronized
+        concurrently.
+        """
 
         client = self.get_client()
         response_data = await self.get_managed_objects()
@@ -42,13 +56,50 @@ class GattApplicationClient(DBusClientMixin, sdbus.DbusObjectManagerInterfaceAsy
             if iface not in interfaces:
                 continue
             obj: DBusClientMixin = iface(client, path)
-            await obj.properties_setup_sync_task()
             self.objects[path] = obj
 
+        await map_with_concurrency(
+            lambda x: x.properties_setup_sync_task(), self.objects.values(), concurrency)
+
+        async def on_interfaces_added(data):
+            path, iface, _ = parse_interfaces_added(
+                interfaces, data,
+                on_unknown_interface="none",
+                on_unknown_member="ignore")
+            if iface not in interfaces or path in self.objects:
+                return
+            logger.debug("Object added to GATT application %s", path)
+            obj: DBusClientMixin = iface(client, path)
+            try:
+                await obj.properties_setup_sync_task()
+            except Exception:
+                await obj.cleanup()
+                raise
+            self.objects[path] = obj
+            await self.objects_changed_callback([obj], [])
+
+        async def on_interfaces_removed(path):
+            if obj := self.objects.pop(path, None):
+                logger.debug("Object removed from GATT application %s", path)
+                await obj.cleanup()
+                await self.objects_changed_callback([], [obj])
+
+        # Failure of a single update shall not stop processing of the next ones.
+        async def catch_interfaces_added():
+            async for data in self.interfaces_added.catch():
+                try:
+                    await on_interfaces_added(data)
+                except Exception:
+                    logger.exception("Cannot add object to GATT application %s",
+                                     self.get_object_path())
+
         async def catch_interfaces_removed():
             async for path, _ in self.interfaces_removed.catch():
-                if self.objects.pop(path, None):
-                    logger.debug("Object removed from GATT application %s", path)
-                    await self.interfaces_removed_callback()
+                try:
+                    await on_interfaces_removed(path)
+                except Exception:
+                    logger.exception("Cannot remove object from GATT application %s",
+                                     self.get_object_path())
 
+        self.interfaces_added_task = asyncio.create_task(catch_interfaces_added())
         self.interfaces_removed_task = asyncio.create_task(catch_interfaces_removed())
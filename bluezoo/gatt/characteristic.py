@@ -2,44 +2,202 @@
 # SPDX-License-Identifier: GPL-2.0-only
 
 import asyncio
-import os
-from typing import Any, BinaryIO
+import time
+from typing import Any
 
 import sdbus
 
 from .. import events
+from ..exceptions import DBusBluezFailedError
 from ..interfaces.GattCharacteristic import GattCharacteristicInterface
 from ..log import logger
-from ..utils import (BluetoothUUID, DBusClientMixin, create_background_task,
-                     dbus_method_async_except_logging, dbus_property_async_except_logging)
+from ..utils import (BluetoothUUID, DBusClientMixin, DBusServerMixin, Latency,
+                     create_background_task, properties_snapshot)
+from .procedures import GattLongRead
+from .relay import GattSocketReader, GattSocketRelay, GattSocketWriter
 from .service import GattServiceClientLink
 
 
 class GattCharacteristicClient(DBusClientMixin, GattCharacteristicInterface):
     """D-Bus client for GATT characteristic."""
 
+    # Maximal number of indication confirmations in flight.
+    CONFIRM_WINDOW = 8
+
     def __init__(self, service, path):
         super().__init__(service, path)
+        # Links subscribed for notifications. The notification session with the
+        # server is shared by all links, so the server sees a single subscriber.
+        self.notify_links: set[GattCharacteristicInterface] = set()
+        self.notify_subscription: events.Subscriber | None = None
+        self.notify_reader: GattSocketReader | None = None
+        self.notify_indicate = False
+        # Serialize starting and stopping of the notification session.
+        self.notify_lock = asyncio.Lock()
+
+        self.confirm_window = asyncio.Semaphore(self.CONFIRM_WINDOW)
+        # Time from receiving a value to delivering it to all links
+        # (notifications) or to the confirmation (indications).
+        self.notify_latency = Latency()
+        self.indicate_latency = Latency()
+
+    async def cleanup(self):
+        self.notify_links.clear()
+        if self.notify_subscription is not None:
+            self.notify_subscription.unsubscribe()
+        if self.notify_reader is not None:
+            self.notify_reader.close()
+        await super().cleanup()
+
+    @property
+    def is_indicate(self) -> bool:
+        return any(x.endswith("indicate") for x in self.Flags.get([]))
+
+    async def __notify_links(self, values: list[bytes]):
+        # Emit property updates in the order of received values. Every value
+        # is a separate notification, so the updates must not be coalesced.
+        for value in values:
+            for link in tuple(self.notify_links):
+                await link.Value.set_async(value, coalesce=False)
+
+    async def __on_properties_changed(self, event: events.PropertiesChanged):
+        if "Value" not in event.properties:
+            return
+        received = time.monotonic()
+        await self.__notify_links([event.properties["Value"]])
+        if not self.notify_indicate:
+            self.notify_latency.add(time.monotonic() - received)
+            return
+        # Issue the confirmation asynchronously, so the next value can
+        # be delivered without waiting for the round trip. Confirmations
+        # are sent in order, and the number of confirmations in flight
+        # is bounded by the confirmation window.
+        await self.confirm_window.acquire()
+        create_background_task(self.__confirm(received))
+
+    async def __confirm(self, received: float):
+        try:
+            # Confirm the indication via D-Bus call.
+            await self.Confirm()
+        except sdbus.SdBusBaseError as e:
+            logger.debug("Confirming indication of %s failed: %s", self.get_object_path(), e)
+        finally:
+            self.confirm_window.release()
+        self.indicate_latency.add(time.monotonic() - received)
+
+    async def start_notify(self, link: GattCharacteristicInterface, options: dict):
+        """Subscribe the link for notifications.
+
+        The notification session with the server is started for the first
+        subscribed link only. All subsequent links share the same session.
+        The link is subscribed only if the session has been started.
+        """
+        async with self.notify_lock:
+            if not self.notify_links:
+                await self.__start_notify_session(options)
+            self.notify_links.add(link)
+
+    async def __start_notify_session(self, options: dict):
+        acquired = self.NotifyAcquired.get()
+        logger.debug("Starting notification session of %s", self.get_object_path())
+        is_indicate = self.notify_indicate = self.is_indicate
 
+        if acquired is None:
+            # The subscription does not keep the client alive.
+            self.notify_subscription = events.subscribe(
+                events.PropertiesChanged, id(self), self.__on_properties_changed, weak=True)
+            try:
+                await self.StartNotify()
+            except BaseException:
+                self.notify_subscription.unsubscribe()
+                self.notify_subscription = None
+                raise
 
-class GattCharacteristicClientLink(GattCharacteristicInterface):
+        elif not acquired:
+            fd, mtu = await self.AcquireNotify(options)
+            latency = self.indicate_latency if is_indicate else self.notify_latency
+
+            async def notify(values: list[bytes], received: float):
+                await self.__notify_links(values)
+                latency.add(time.monotonic() - received)
+
+            def on_packets(packets: list[bytes]):
+                if is_indicate:
+                    # Confirm the indications via file descriptor.
+                    for _ in packets:
+                        self.notify_reader.send(b"\x01")
+                create_background_task(notify(packets, time.monotonic()))
+
+            def on_close():
+                self.notify_reader = None
+                # The socket was closed by the server (or the session was
+                # stopped), so none of the links is subscribed any more.
+                self.notify_links.clear()
+
+            self.notify_reader = GattSocketReader(fd, mtu, on_packets, on_close)
+
+    async def stop_notify(self, link: GattCharacteristicInterface):
+        """Unsubscribe the link from notifications.
+
+        The notification session with the server is stopped when the last
+        subscribed link leaves.
+        """
+        async with self.notify_lock:
+            if link not in self.notify_links:
+                return
+            self.notify_links.remove(link)
+            if not self.notify_links:
+                await self.__stop_notify_session()
+
+    async def __stop_notify_session(self):
+        logger.debug("Stopping notification session of %s: notify %s, indicate %s",
+                     self.get_object_path(), self.notify_latency, self.indicate_latency)
+        if self.notify_subscription is not None:
+            self.notify_subscription.unsubscribe()
+            self.notify_subscription = None
+            try:
+                await self.StopNotify()
+            except sdbus.SdBusBaseError as e:
+                logger.debug("Stopping notification of %s failed: %s", self.get_object_path(), e)
+        if self.notify_reader is not None:
+            self.notify_reader.close()
+
+
+class GattCharacteristicClientLink(DBusServerMixin, GattCharacteristicInterface):
     """GATT characteristic server linked with a remote client."""
 
     def __init__(self, client: GattCharacteristicClient, service: GattServiceClientLink):
         super().__init__()
         self.client = client
         self.service = service
+        # Memoized object path with the handle and the parent's path it was made of.
+        self._path = self._path_handle = self._path_parent = None
+        # Properties of the link mirror properties of the client and the
+        # parent's path depends on the handle of the parent's client.
+        properties_snapshot.add_source(self, client)
+        properties_snapshot.add_source(self, service.client)
 
         self.mtu = self.client.MTU.get(512)
         self.link = "LE"
 
-        self.client_props_changed_subscription = events.Subscription()
-        self.f_read: BinaryIO | None = None
-        self.f_write: BinaryIO | None = None
+        self.writer: GattSocketWriter | None = None
+        # Relays of sockets acquired by remote clients.
+        self.relays: set[GattSocketRelay] = set()
+        self.long_read = GattLongRead()
 
     def __str__(self):
         return self.client.get_object_path()
 
+    async def cleanup(self):
+        self.long_read.discard()
+        await self.client.stop_notify(self)
+        if self.writer is not None:
+            self.writer.close()
+        # Remote clients shall not be able to use acquired sockets
+        # once the link is gone (e.g. after the device disconnects).
+        for relay in list(self.relays):
+            relay.close()
+
     def __prepare_options(self, options: dict):
         options.update({
             "device": ("o", self.service.device.peer.get_object_path()),
@@ -47,157 +205,142 @@ class GattCharacteristicClientLink(GattCharacteristicInterface):
             "link": ("s", self.link)})
         return options
 
+    def __relay(self, fd: int, mtu: int) -> GattSocketRelay:
+        """Relay the acquired server socket to a remote client."""
+
+        def on_close():
+            self.relays.discard(relay)
+
+        relay = GattSocketRelay(fd, mtu, on_close)
+        self.relays.add(relay)
+        return relay
+
     def get_object_path(self):
-        handle = hex(self.client.Handle.get())[2:].zfill(4)
-        return f"{self.service.get_object_path()}/char{handle}"
+        # Format the path only if the handle or the parent's path has changed.
+        handle = self.client.Handle.get()
+        parent = self.service.get_object_path()
+        if handle != self._path_handle or parent is not self._path_parent:
+            self._path_handle, self._path_parent = handle, parent
+            self._path = f"{parent}/char{handle:04x}"
+        return self._path
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def ReadValue(self, options: dict[str, tuple[str, Any]]) -> bytes:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to read value of %s", sender, self)
-        return await self.client.ReadValue(self.__prepare_options(options))
+        offset = options.get("offset", ("q", 0))[1]
+        return await self.long_read.read(
+            sender, offset, self.mtu,
+            lambda: self.client.ReadValue(self.__prepare_options(options)))
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def WriteValue(self, value: bytes, options: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
         acquired = self.client.WriteAcquired.get()
         logger.debug("Client %s requested to write value of %s", sender, self)
+        self.long_read.discard()
+
+        if options.get("type", ("s", ""))[1] == "reliable":
+            # The server gets the whole value with a single write.
+            await self.service.device.gatt_prepared_writes.write(
+                self, options.get("offset", ("q", 0))[1], value, self.mtu,
+                lambda x: self.client.WriteValue(x, self.__prepare_options(options)))
+            return
+
         if acquired is None:
             await self.client.WriteValue(value, self.__prepare_options(options))
-        elif not acquired:
+            return
+
+        if not acquired and self.writer is None:
             fd, self.mtu = await self.client.AcquireWrite(self.__prepare_options({}))
-            # Duplicate the file descriptor before opening the socket to
-            # avoid closing the file descriptor by the D-Bus library.
-            self.f_write = open(os.dup(fd), "wb", buffering=0)  # noqa: ASYNC230, SIM115
-            self.f_write.write(value)
-        elif self.f_write is not None:
-            # Write to the previously acquired file descriptor.
-            self.f_write.write(value)
+            properties_snapshot.invalidate(self)
+
+            def on_close():
+                self.writer = None
+
+            self.writer = GattSocketWriter(fd, self.mtu, on_close)
+
+        if self.writer is not None:
+            try:
+                # Write to the previously acquired file descriptor.
+                await self.writer.write(value)
+            except (TimeoutError, ConnectionError) as e:
+                logger.info("Writing to %s failed: %s", self, e)
+                msg = "Failed"
+                raise DBusBluezFailedError(msg) from e
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def AcquireWrite(self, options: dict[str, tuple[str, Any]]) -> tuple[int, int]:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to acquire write of %s", sender, self)
-        return await self.client.AcquireWrite(options)
+        fd, mtu = await self.client.AcquireWrite(self.__prepare_options(options))
+        return self.__relay(fd, mtu).get_remote_fd(), mtu
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def AcquireNotify(self, options: dict[str, tuple[str, Any]]) -> tuple[int, int]:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to acquire notify of %s", sender, self)
-        return await self.client.AcquireNotify(options)
+        fd, mtu = await self.client.AcquireNotify(self.__prepare_options(options))
+        return self.__relay(fd, mtu).get_remote_fd(), mtu
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def StartNotify(self) -> None:
         sender = sdbus.get_current_message().sender
-        acquired = self.client.NotifyAcquired.get()
         logger.debug("Client %s requested to start notification of %s", sender, self)
-
-        if acquired is None and not self.client.Notifying.get():
-
-            async def on_properties_changed(properties: dict[str, Any]):
-                if "Value" in properties:
-                    await self.Value.set_async(properties["Value"])
-                    # Confirm the indication via D-Bus call.
-                    await self.client.Confirm()
-
-            self.client_props_changed_subscription = events.subscribe(
-                f"properties:changed:{id(self.client)}", on_properties_changed)
-            await self.client.StartNotify()
-
-        elif not acquired:
-            fd, self.mtu = await self.client.AcquireNotify(self.__prepare_options({}))
-            # Duplicate the file descriptor before opening the socket to
-            # avoid closing the file descriptor by the D-Bus library.
-            self.f_read = open(os.dup(fd), "r+b", buffering=0)  # noqa: ASYNC230, SIM115
-
-            def reader():
-                if data := self.f_read.read(self.mtu):
-                    create_background_task(self.Value.set_async(data))
-                    if "indicate" in self.client.Flags.get():
-                        # Confirm the indication via file descriptor.
-                        self.f_read.write(b"\x01")
-                elif self.f_read is not None:
-                    loop = asyncio.get_running_loop()
-                    loop.remove_reader(self.f_read)
-                    self.f_read.close()
-                    self.f_read = None
-
-            loop = asyncio.get_running_loop()
-            loop.add_reader(self.f_read, reader)
+        await self.client.start_notify(self, self.__prepare_options({}))
+        if self.client.notify_reader is not None:
+            self.mtu = self.client.notify_reader.mtu
+            properties_snapshot.invalidate(self)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def StopNotify(self) -> None:
         sender = sdbus.get_current_message().sender
-        acquired = self.client.NotifyAcquired.get()
         logger.debug("Client %s requested to stop notification of %s", sender, self)
-        if acquired is None:
-            await self.client.StopNotify()
-            self.client_props_changed_subscription.unsubscribe()
-        elif acquired:
-            if self.f_read is not None:
-                loop = asyncio.get_running_loop()
-                loop.remove_reader(self.f_read.fileno())
-                self.f_read.close()
-                self.f_read = None
+        await self.client.stop_notify(self)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def Confirm(self) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s confirmed %s", sender, self)
         return await self.client.Confirm()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def UUID(self) -> str:
         return BluetoothUUID(self.client.UUID.get())
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Service(self) -> str:
         return self.service.get_object_path()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Value(self) -> bytes:
         return self.client.Value.get(b"")
 
     @Value.setter_private
     def Value_setter(self, value: bytes):
         self.client.Value.cache(value)
+        self.long_read.discard()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Notifying(self) -> bool:
         return self.client.Notifying.get(False)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Flags(self) -> list[str]:
         return self.client.Flags.get([])
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def WriteAcquired(self) -> bool:
         return self.client.WriteAcquired.get(False)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def NotifyAcquired(self) -> bool:
         return self.client.NotifyAcquired.get(False)
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def MTU(self) -> int:
         return self.mtu
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Handle(self) -> int:
         return self.client.Handle.get()
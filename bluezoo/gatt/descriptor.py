@@ -7,9 +7,9 @@ import sdbus
 
 from ..interfaces.GattDescriptor import GattDescriptorInterface
 from ..log import logger
-from ..utils import (BluetoothUUID, DBusClientMixin, dbus_method_async_except_logging,
-                     dbus_property_async_except_logging)
+from ..utils import BluetoothUUID, DBusClientMixin, DBusServerMixin, properties_snapshot
 from .characteristic import GattCharacteristicClientLink
+from .procedures import GattLongRead
 
 
 class GattDescriptorClient(DBusClientMixin, GattDescriptorInterface):
@@ -19,17 +19,27 @@ class GattDescriptorClient(DBusClientMixin, GattDescriptorInterface):
         super().__init__(service, path)
 
 
-class GattDescriptorClientLink(GattDescriptorInterface):
+class GattDescriptorClientLink(DBusServerMixin, GattDescriptorInterface):
     """GATT descriptor server linked with a remote client."""
 
     def __init__(self, client: GattDescriptorClient, characteristic: GattCharacteristicClientLink):
         super().__init__()
         self.client = client
         self.characteristic = characteristic
+        # Memoized object path with the handle and the parent's path it was made of.
+        self._path = self._path_handle = self._path_parent = None
+        # Properties of the link mirror properties of the client and the
+        # parent's path depends on the handle of the parent's client.
+        properties_snapshot.add_source(self, client)
+        properties_snapshot.add_source(self, characteristic.client)
+        self.long_read = GattLongRead()
 
     def __str__(self):
         return self.get_object_path()
 
+    async def cleanup(self):
+        self.long_read.discard()
+
     def __prepare_options(self, options: dict):
         options.update({
             "device": ("o", self.characteristic.service.device.peer.get_object_path()),
@@ -38,44 +48,52 @@ class GattDescriptorClientLink(GattDescriptorInterface):
         return options
 
     def get_object_path(self):
-        handle = hex(self.client.Handle.get())[2:].zfill(4)
-        return f"{self.characteristic.get_object_path()}/desc{handle}"
+        # Format the path only if the handle or the parent's path has changed.
+        handle = self.client.Handle.get()
+        parent = self.characteristic.get_object_path()
+        if handle != self._path_handle or parent is not self._path_parent:
+            self._path_handle, self._path_parent = handle, parent
+            self._path = f"{parent}/desc{handle:04x}"
+        return self._path
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def ReadValue(self, options: dict[str, tuple[str, Any]]) -> bytes:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to read value of %s", sender, self)
-        return await self.client.ReadValue(self.__prepare_options(options))
+        offset = options.get("offset", ("q", 0))[1]
+        return await self.long_read.read(
+            sender, offset, self.characteristic.mtu,
+            lambda: self.client.ReadValue(self.__prepare_options(options)))
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def WriteValue(self, value: bytes, options: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to write value of %s", sender, self)
+        self.long_read.discard()
+        if options.get("type", ("s", ""))[1] == "reliable":
+            # The server gets the whole value with a single write.
+            await self.characteristic.service.device.gatt_prepared_writes.write(
+                self, options.get("offset", ("q", 0))[1], value, self.characteristic.mtu,
+                lambda x: self.client.WriteValue(x, self.__prepare_options(options)))
+            return
         await self.client.WriteValue(value, self.__prepare_options(options))
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def UUID(self) -> str:
         return BluetoothUUID(self.client.UUID.get())
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Characteristic(self) -> str:
         return self.characteristic.get_object_path()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Value(self) -> bytes:
         return self.client.Value.get(b"")
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Flags(self) -> list[str]:
         return self.client.Flags.get([])
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Handle(self) -> int:
         return self.client.Handle.get()
@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+
+class GattHandleAllocator:
+    """Allocate GATT attribute handles with reuse of released handles."""
+
+    HANDLE_MIN = 0x0001
+    HANDLE_MAX = 0xFFFF
+
+    def __init__(self):
+        # Sorted list of allocated handles.
+        self._handles: list[int] = []
+
+    def __contains__(self, handle: int) -> bool:
+        i = bisect_left(self._handles, handle)
+        return i < len(self._handles) and self._handles[i] == handle
+
+    def __len__(self):
+        return len(self._handles)
+
+    def claim(self, handle: int):
+        """Allocate the given handle."""
+        if not self.HANDLE_MIN <= handle <= self.HANDLE_MAX:
+            msg = f"Handle {handle} out of range"
+            raise ValueError(msg)
+        i = bisect_left(self._handles, handle)
+        if i < len(self._handles) and self._handles[i] == handle:
+            msg = f"Handle {handle} already exists"
+            raise ValueError(msg)
+        self._handles.insert(i, handle)
+
+    def reserve(self, count: int) -> range:
+        """Allocate the lowest range of consecutive free handles."""
+        i, start = 0, self.HANDLE_MIN
+        for i, handle in enumerate(self._handles):
+            if handle - start >= count:
+                break
+            start = handle + 1
+        else:
+            i = len(self._handles)
+        if start + count - 1 > self.HANDLE_MAX:
+            msg = f"No room for {count} handles"
+            raise ValueError(msg)
+        handles = range(start, start + count)
+        self._handles[i:i] = handles
+        return handles
+
+    def allocate(self) -> int:
+        """Allocate the lowest free handle."""
+        return self.reserve(1)[0]
+
+    def release(self, handles: Iterable[int]):
+        """Release previously allocated handles."""
+        for handle in handles:
+            i = bisect_left(self._handles, handle)
+            if i < len(self._handles) and self._handles[i] == handle:
+                del self._handles[i]
+
+
+class GattAttributeTable:
+    """Handle-ordered table of GATT attributes."""
+
+    def __init__(self):
+        # Sorted list of handles and the attributes for these handles.
+        self._handles: list[int] = []
+        self._attributes: dict[int, Any] = {}
+
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._attributes
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Iterate over attributes in the handle order."""
+        for handle in self._handles:
+            yield self._attributes[handle]
+
+    def handles(self) -> list[int]:
+        return list(self._handles)
+
+    def add(self, handle: int, attribute: Any):
+        if handle in self._attributes:
+            msg = f"Handle {handle} already exists"
+            raise ValueError(msg)
+        self._handles.insert(bisect_left(self._handles, handle), handle)
+        self._attributes[handle] = attribute
+
+    def remove(self, handle: int) -> Any:
+        del self._handles[bisect_left(self._handles, handle)]
+        return self._attributes.pop(handle)
+
+    def get(self, handle: int, default: Any = None) -> Any:
+        return self._attributes.get(handle, default)
+
+    def find(self, start: int, end: int = GattHandleAllocator.HANDLE_MAX) -> Iterator[Any]:
+        """Iterate over attributes within the given (inclusive) handle range."""
+        lo = bisect_left(self._handles, start)
+        hi = bisect_right(self._handles, end)
+        for handle in self._handles[lo:hi]:
+            yield self._attributes[handle]
@@ -1,7 +1,9 @@
 # SPDX-FileCopyrightText: 2025 BlueZoo developers
 # SPDX-License-Identifier: GPL-2.0-only
 
-from collections.abc import Iterable
+import time
+from collections import Counter
+from collections.abc import Iterable, KeysView
 from typing import Any
 
 import sdbus
@@ -9,15 +11,16 @@ import sdbus
 from ..exceptions import DBusBluezDoesNotExistError
 from ..interfaces.GattManager import GattManagerInterface
 from ..log import logger
-from ..utils import BluetoothUUID, dbus_method_async_except_logging
+from ..utils import BluetoothUUID, DBusServerMixin, map_with_concurrency
 from .application import GattApplicationClient
 from .characteristic import GattCharacteristicClient
 from .descriptor import GattDescriptorClient
+from .handles import GattHandleAllocator
 from .profile import GattProfileClient
 from .service import GattServiceClient
 
 
-class GattManager(GattManagerInterface):
+class GattManager(DBusServerMixin, GattManagerInterface):
     """GATT manager."""
 
     def __init__(self, adapter):
@@ -26,8 +29,14 @@ class GattManager(GattManagerInterface):
         self.apps: dict[tuple[str, str], GattApplicationClient] = {}
 
         self._adapter = adapter
-        self._handles = set()
-        self._handle_counter = 0
+        self._handles = GattHandleAllocator()
+
+        # Indexes of UUIDs of all registered applications. The primary service
+        # index is a multiset, because applications might register the same
+        # service, while the autoconnect index maps UUID to the number of
+        # applications which want to autoconnect it.
+        self._primary_services: Counter[BluetoothUUID] = Counter()
+        self._autoconnect_services: Counter[BluetoothUUID] = Counter()
 
     async def cleanup(self):
         for app in self.apps.values():
@@ -36,26 +45,128 @@ class GattManager(GattManagerInterface):
     async def __del_gatt_application(self, app: GattApplicationClient) -> None:
         logger.info("Removing GATT application %s from %s", app.get_object_path(), self._adapter)
         self.apps.pop((app.get_client(), app.get_object_path()), None)
+        self._handles.release(app.attributes.handles())
+        self._primary_services -= Counter(app.primary_services)
+        self._autoconnect_services -= Counter(app.autoconnect_services)
+        for device in self.__linked_devices():
+            await device.remove_services(app)
         await app.cleanup()
         await self._adapter.update_uuids()
 
-    def get_autoconnect_services(self) -> Iterable[BluetoothUUID]:
+    def __linked_devices(self) -> list:
+        """Get devices which represent our adapter on other adapters."""
+        return [device for adapter in self._adapter.mock.adapters.values()
+                for device in adapter.devices.values() if device.peer_adapter is self._adapter]
+
+    async def __assign_handles(self, app: GattApplicationClient, objects: Iterable):
+        """Assign handles to the GATT attributes and add them to the application."""
+        objects = [obj for obj in sorted(objects, key=lambda x: x.get_object_path())
+                   if not isinstance(obj, GattProfileClient)]
+        # Claim handles already assigned by the server, and reserve a range
+        # of handles for the objects which do not have one.
+        handles = []
+        try:
+            for obj in objects:
+                if handle := obj.Handle.get():
+                    self._handles.claim(handle)
+                    handles.append(handle)
+            reserved = self._handles.reserve(sum(1 for obj in objects if not obj.Handle.get()))
+            handles.extend(reserved)
+            reserved = iter(reserved)
+            writes = []
+            for obj in objects:
+                # Assign handle values to objects that don't have one.
+                if obj.Handle.get() == 0:
+                    # Let the server know the new handle value.
+                    writes.append((obj, next(reserved)))
+                elif obj.Handle.get() is None:
+                    # If server does not have the Handle property, update local cache only.
+                    obj.Handle.cache(next(reserved))
+            await map_with_concurrency(
+                lambda x: x[0].Handle.set_async(x[1]), writes, self.__concurrency)
+            for obj in objects:
+                app.attributes.add(obj.Handle.get(), obj)
+        except Exception:
+            for handle in handles:
+                if handle in app.attributes:
+                    app.attributes.remove(handle)
+            self._handles.release(handles)
+            raise
+
+    def __index_add(self, app: GattApplicationClient, objects: Iterable):
+        """Add UUIDs of the given objects to the service indexes."""
+        for obj in objects:
+            if isinstance(obj, GattProfileClient):
+                uuids = {BluetoothUUID(x) for x in obj.UUIDs.get()} - app.autoconnect_services
+                app.autoconnect_services.update(uuids)
+                self._autoconnect_services.update(uuids)
+            elif isinstance(obj, GattServiceClient) and obj.Primary.get():
+                uuid = BluetoothUUID(obj.UUID.get())
+                app.primary_services.append(uuid)
+                self._primary_services[uuid] += 1
+
+    def __index_remove(self, app: GattApplicationClient, objects: Iterable):
+        """Remove UUIDs of the given objects from the service indexes."""
+        for obj in objects:
+            if isinstance(obj, GattProfileClient):
+                uuids = {BluetoothUUID(x) for x in obj.UUIDs.get()} & app.autoconnect_services
+                app.autoconnect_services.difference_update(uuids)
+                self._autoconnect_services -= Counter(uuids)
+            elif isinstance(obj, GattServiceClient) and obj.Primary.get():
+                uuid = BluetoothUUID(obj.UUID.get())
+                app.primary_services.remove(uuid)
+                self._primary_services -= Counter((uuid,))
+
+    async def __update_gatt_application(self, app: GattApplicationClient,
+                                        added: list, removed: list) -> None:
+        """Apply objects added to or removed from the registered GATT application.
+
+        Handles are allocated (or released) only for the changed attributes,
+        and devices linked with this application are notified about the
+        changed handle range, like with the Service Changed indication.
+        """
+        handles = []
+        for obj in removed:
+            if (handle := obj.Handle.get()) and app.attributes.get(handle) is obj:
+                app.attributes.remove(handle)
+                self._handles.release((handle,))
+                handles.append(handle)
+        try:
+            await self.__assign_handles(app, added)
+        except Exception as e:
+            logger.warning("Cannot add objects to GATT application %s: %s",
+                           app.get_object_path(), e)
+            for obj in added:
+                app.objects.pop(obj.get_object_path(), None)
+                await obj.cleanup()
+            added = []
+        handles.extend(obj.Handle.get() for obj in added
+                       if not isinstance(obj, GattProfileClient))
+
+        self.__index_remove(app, removed)
+        self.__index_add(app, added)
+        await self._adapter.update_uuids()
+
+        if not handles:
+            return
+        logger.info("Service changed on %s: handles 0x%04x-0x%04x",
+                    self._adapter, min(handles), max(handles))
+        for device in self.__linked_devices():
+            await device.update_services(app)
+
+    @property
+    def __concurrency(self) -> int:
+        return self._adapter.mock.gatt_concurrency
+
+    def get_autoconnect_services(self) -> KeysView[BluetoothUUID]:
         """Get UUIDs of all services marked for autoconnect."""
-        for app in self.apps.values():
-            for obj in app.objects.values():
-                if isinstance(obj, GattProfileClient):
-                    for uuid in obj.UUIDs.get():
-                        yield BluetoothUUID(uuid)
+        return self._autoconnect_services.keys()
 
-    def get_primary_services(self) -> Iterable[BluetoothUUID]:
+    def get_primary_services(self) -> KeysView[BluetoothUUID]:
         """Get UUIDs of all registered primary services."""
-        for app in self.apps.values():
-            for obj in app.objects.values():
-                if isinstance(obj, GattServiceClient) and obj.Primary.get():
-                    yield BluetoothUUID(obj.UUID.get())
+        return self._primary_services.keys()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RegisterApplication(self, path: str,
                                   options: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
@@ -65,34 +176,30 @@ class GattManager(GattManagerInterface):
         async def on_sender_lost():
             await self.__del_gatt_application(app)
 
-        app = GattApplicationClient(sender, path, options, on_sender_lost)
-        await app.object_manager_setup_sync_task(
-            (GattServiceClient, GattCharacteristicClient, GattDescriptorClient, GattProfileClient))
+        async def on_objects_changed(added, removed):
+            await self.__update_gatt_application(app, added, removed)
+
+        start = time.monotonic()
+        app = GattApplicationClient(sender, path, options, on_sender_lost, on_objects_changed)
+        try:
+            await app.object_manager_setup_sync_task(
+                (GattServiceClient, GattCharacteristicClient, GattDescriptorClient,
+                 GattProfileClient),
+                self.__concurrency)
+            await self.__assign_handles(app, app.objects.values())
+        except Exception:
+            await app.cleanup()
+            raise
 
-        logger.info("Adding GATT application %s on %s", app.get_object_path(), self._adapter)
+        logger.info("Adding GATT application %s on %s (%d objects in %.3f seconds)",
+                    app.get_object_path(), self._adapter, len(app.objects),
+                    time.monotonic() - start)
         self.apps[sender, path] = app
-
-        for obj in app.objects.values():
-            if isinstance(obj, GattProfileClient):
-                continue
-            # Assign handle values to objects that don't have one.
-            if obj.Handle.get() == 0:
-                self._handle_counter += 1
-                # Let the server know the new handle value.
-                await obj.Handle.set_async(self._handle_counter)
-            elif obj.Handle.get() is None:
-                self._handle_counter += 1
-                # If server does not have the Handle property, update local cache only.
-                obj.Handle.cache(self._handle_counter)
-            elif obj.Handle.get() in self._handles:
-                msg = f"Handle {obj.Handle.get()} already exists"
-                raise ValueError(msg)
-            self._handles.add(obj.Handle.get())
+        self.__index_add(app, app.objects.values())
 
         await self._adapter.update_uuids()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def UnregisterApplication(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to unregister GATT application %s", sender, path)
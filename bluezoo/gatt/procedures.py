@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ..exceptions import (DBusBluezFailedError, DBusBluezInvalidOffsetError,
+                          DBusBluezInvalidValueLengthError)
+from ..log import logger
+from ..utils import Latency
+
+
+class GattLongRead:
+    """Long read procedure engine of a GATT attribute.
+
+    A long read is a sequence of reads with increasing offsets. The value is
+    fetched from the server once, at the beginning of the procedure (read at
+    the offset 0), and subsequent reads are served from a memory view of the
+    fetched value. The buffer is discarded when the last part of the value
+    is read, when the procedure times out, or when the value is written.
+    """
+
+    # Time after which an unfinished procedure is discarded (ATT transaction timeout).
+    TIMEOUT = 30
+
+    def __init__(self):
+        # Values of ongoing procedures and their timeouts indexed by the reader.
+        self.buffers: dict[str, tuple[memoryview, asyncio.TimerHandle]] = {}
+        # Number of reads served from the buffer and forwarded to the server.
+        self.hits = 0
+        self.misses = 0
+
+    async def read(self, reader: str, offset: int, mtu: int,
+                   fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Read the value at the given offset.
+
+        The fetch callback is used to read the value from the server. The mtu
+        determines the size of a single read, so it is possible to tell when
+        the procedure ends.
+        """
+        if offset and (buffer := self.buffers.get(reader)) and offset <= len(buffer[0]):
+            self.hits += 1
+            view = buffer[0]
+            if offset + mtu - 1 >= len(view):
+                self.end(reader)
+            return bytes(view[offset:])
+
+        self.misses += 1
+        value = await fetch()
+        if offset:
+            return value
+        self.end(reader)
+        # Start the procedure only if the value does not fit in a single read.
+        if len(value) > mtu - 1:
+            loop = asyncio.get_running_loop()
+            handle = loop.call_later(self.TIMEOUT, self.__timeout, reader)
+            self.buffers[reader] = memoryview(value), handle
+        return value
+
+    def end(self, reader: str):
+        """End the long read procedure of the given reader."""
+        if buffer := self.buffers.pop(reader, None):
+            buffer[1].cancel()
+
+    def discard(self):
+        """Discard all ongoing procedures."""
+        for reader in list(self.buffers):
+            self.end(reader)
+
+    def __timeout(self, reader: str):
+        logger.debug("Long read procedure of %s timed out", reader)
+        self.buffers.pop(reader, None)
+
+
+class GattPreparedWrites:
+    """Prepared (reliable) write queue of a GATT connection.
+
+    The BlueZ D-Bus API performs the whole reliable write procedure within
+    a single WriteValue call. The written value is split into fragments of
+    the ATT Prepare Write request size, which are kept in the queue shared
+    by all attributes of the connection. The queue is executed right away:
+    fragments are validated and assembled into a single value, which is
+    written to the server with one upstream call.
+    """
+
+    # Maximal number of fragments in the queue.
+    QUEUE_SIZE_MAX = 64
+    # Maximal length of the attribute value (as defined by the ATT protocol).
+    VALUE_SIZE_MAX = 512
+    # Size of the ATT Prepare Write request header.
+    HEADER_SIZE = 5
+
+    def __init__(self):
+        # Queued fragments: attribute, offset, value and the write callback.
+        self.queue: list[tuple[Any, int, bytes, Callable[[bytes], Awaitable]]] = []
+        self.queue_length_max = 0
+        self.commit_latency = Latency()
+
+    def __len__(self):
+        return len(self.queue)
+
+    async def write(self, attribute: Any, offset: int, value: bytes, mtu: int,
+                    write: Callable[[bytes], Awaitable]):
+        """Write the value at the given offset with the reliable write procedure.
+
+        The write callback is called with the assembled value, which starts
+        at the given offset.
+        """
+        size = max(mtu - self.HEADER_SIZE, 1)
+        try:
+            for i in range(0, max(len(value), 1), size):
+                self.prepare(attribute, offset + i, value[i:i + size], write)
+        except Exception:
+            self.cancel()
+            raise
+        await self.execute()
+
+    def prepare(self, attribute: Any, offset: int, value: bytes,
+                write: Callable[[bytes], Awaitable]):
+        """Add the fragment of the attribute value to the queue."""
+        if len(self.queue) >= self.QUEUE_SIZE_MAX:
+            msg = "Prepare Queue Full"
+            raise DBusBluezFailedError(msg)
+        if offset + len(value) > self.VALUE_SIZE_MAX:
+            msg = "Invalid Value Length"
+            raise DBusBluezInvalidValueLengthError(msg)
+        self.queue.append((attribute, offset, value, write))
+        if len(self.queue) > self.queue_length_max:
+            self.queue_length_max = len(self.queue)
+
+    async def execute(self):
+        """Write all queued fragments to the server."""
+        start = time.monotonic()
+        queue = self.queue
+        self.cancel()
+        # Assemble values before writing anything, so an invalid
+        # fragment does not leave the attributes partially written.
+        values: dict[Any, tuple[int, bytearray, Callable[[bytes], Awaitable]]] = {}
+        for attribute, offset, value, write in queue:
+            base, buffer, _ = values.setdefault(attribute, (offset, bytearray(), write))
+            if not base <= offset <= base + len(buffer):
+                msg = "Invalid Offset"
+                raise DBusBluezInvalidOffsetError(msg)
+            buffer[offset - base:offset - base + len(value)] = value
+        for _, buffer, write in values.values():
+            await write(bytes(buffer))
+        self.commit_latency.add(time.monotonic() - start)
+        logger.debug("Executed %d prepared writes of %d attributes: queue max %d, commit %s",
+                     len(queue), len(values), self.queue_length_max, self.commit_latency)
+
+    def cancel(self):
+        """Discard all queued fragments."""
+        self.queue = []
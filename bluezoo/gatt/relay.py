@@ -0,0 +1,294 @@
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import os
+import socket
+from collections import deque
+from collections.abc import Callable
+
+from ..log import logger
+
+
+class GattSocketRelay:
+    """Relay packets between acquired GATT server socket and a remote client.
+
+    The relay creates a new socket pair for every acquire request, so every
+    remote client gets its own file descriptor. Packets are moved between the
+    server socket and the local end of the socket pair with a preallocated
+    buffer, preserving packet boundaries of the SOCK_SEQPACKET sockets.
+    """
+
+    def __init__(self, fd: int, mtu: int, close_callback: Callable[[], None] | None = None):
+        # Duplicate the file descriptor to avoid closing
+        # the file descriptor by the D-Bus library.
+        self.upstream = socket.socket(fileno=os.dup(fd))
+        self.downstream, self.remote = socket.socketpair(socket.AF_UNIX, self.upstream.type)
+        self.upstream.setblocking(False)
+        self.downstream.setblocking(False)
+        self.close_callback = close_callback
+        self.mtu = mtu
+
+        self._loop = asyncio.get_running_loop()
+        self._channels = (
+            _GattSocketRelayChannel(self, self.upstream, self.downstream),
+            _GattSocketRelayChannel(self, self.downstream, self.upstream))
+        for channel in self._channels:
+            channel.resume()
+
+    def __str__(self):
+        return f"relay[{self.upstream.fileno()}->{self.downstream.fileno()}]"
+
+    def get_remote_fd(self) -> int:
+        """Get the file descriptor for the remote client.
+
+        The remote end of the socket pair is closed on the next loop iteration.
+        This relies on sdbus building the method reply (which duplicates the
+        descriptor) in the same task step in which the D-Bus method returns,
+        see DbusLocalMethodAsync._dbus_reply_call_async. Hence, the descriptor
+        must be returned from the D-Bus method without awaiting in between.
+        Afterwards, the remote client is the only owner.
+        """
+        self._loop.call_soon(self.remote.close)
+        return self.remote.fileno()
+
+    @property
+    def closed(self) -> bool:
+        return self.upstream.fileno() == -1
+
+    def close(self):
+        if self.closed:
+            return
+        logger.debug("Closing %s", self)
+        for channel in self._channels:
+            channel.pause()
+        self.upstream.close()
+        self.downstream.close()
+        self.remote.close()
+        if self.close_callback is not None:
+            self.close_callback()
+
+
+class _GattSocketRelayChannel:
+    """Unidirectional channel of the socket relay."""
+
+    def __init__(self, relay: GattSocketRelay, src: socket.socket, dst: socket.socket):
+        self.relay = relay
+        self.src = src
+        self.dst = dst
+        # Preallocated buffer for the packet being relayed.
+        self.buffer = bytearray(max(relay.mtu, 512))
+        self.view = memoryview(self.buffer)
+        self.pending = 0
+        self.blocked = False
+
+    def resume(self):
+        self.relay._loop.add_reader(self.src, self.on_readable)
+
+    def pause(self):
+        self.relay._loop.remove_reader(self.src)
+        if self.blocked:
+            self.relay._loop.remove_writer(self.dst)
+
+    def on_readable(self):
+        try:
+            n = self.src.recv_into(self.buffer)
+        except BlockingIOError:
+            return
+        except OSError:
+            n = 0
+        if not n:  # EOF
+            self.relay.close()
+            return
+        self.pending = n
+        self.on_writable()
+
+    def on_writable(self):
+        try:
+            self.dst.send(self.view[:self.pending])
+        except BlockingIOError:
+            # The destination is not able to receive more data. Stop reading
+            # from the source until the pending packet can be delivered.
+            if not self.blocked:
+                self.blocked = True
+                self.relay._loop.remove_reader(self.src)
+                self.relay._loop.add_writer(self.dst, self.on_writable)
+            return
+        except OSError:
+            self.relay.close()
+            return
+        self.pending = 0
+        if self.blocked:
+            self.blocked = False
+            self.relay._loop.remove_writer(self.dst)
+            self.resume()
+
+
+class GattSocketReader:
+    """Drain packets from acquired GATT server socket.
+
+    On every wakeup all packets pending on the socket (up to the batch size
+    limit) are read into a reusable buffer and passed to the callback as one
+    batch, so the event loop is not woken up for every single packet.
+    """
+
+    # Maximal number of packets drained on a single wakeup.
+    BATCH_SIZE_MAX = 64
+
+    def __init__(self, fd: int, mtu: int, callback: Callable[[list[bytes]], None],
+                 close_callback: Callable[[], None] | None = None):
+        # Duplicate the file descriptor to avoid closing
+        # the file descriptor by the D-Bus library.
+        self.sock = socket.socket(fileno=os.dup(fd))
+        self.sock.setblocking(False)
+        self.callback = callback
+        self.close_callback = close_callback
+        self.mtu = mtu
+
+        # Reusable buffer for the received packets.
+        self.buffer = bytearray(max(mtu, 512))
+        self.view = memoryview(self.buffer)
+
+        # Number of packets drained on the last wakeup and the peak value.
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.sock, self.__on_readable)
+
+    def __str__(self):
+        return f"reader[{self.sock.fileno()}]"
+
+    @property
+    def closed(self) -> bool:
+        return self.sock.fileno() == -1
+
+    def send(self, data: bytes):
+        """Send data (e.g. indication confirmation) back to the server."""
+        try:
+            self.sock.send(data)
+        except BlockingIOError:
+            logger.warning("Dropping %d bytes on %s", len(data), self)
+
+    def close(self):
+        if self.closed:
+            return
+        logger.debug("Closing %s", self)
+        self._loop.remove_reader(self.sock)
+        self.sock.close()
+        if self.close_callback is not None:
+            self.close_callback()
+
+    def __on_readable(self):
+        packets = []
+        eof = False
+        while len(packets) < self.BATCH_SIZE_MAX:
+            try:
+                n = self.sock.recv_into(self.buffer)
+            except BlockingIOError:
+                break
+            except OSError:
+                n = 0
+            if not n:  # EOF
+                eof = True
+                break
+            packets.append(bytes(self.view[:n]))
+
+        if packets:
+            self.queue_depth = len(packets)
+            if self.queue_depth > self.queue_depth_max:
+                self.queue_depth_max = self.queue_depth
+                logger.debug("Queue depth of %s increased to %d", self, self.queue_depth)
+            self.callback(packets)
+        if eof:
+            self.close()
+
+
+class GattSocketWriter:
+    """Write packets to acquired GATT server socket without blocking.
+
+    Packets which cannot be sent right away are kept in a bounded queue and
+    flushed when the socket becomes writable. When the queue is full, writers
+    are suspended until there is room for more packets (or the stall timeout
+    expires), so a slow GATT server can not stall the whole event loop.
+    """
+
+    # Maximal number of packets waiting for the socket to become writable.
+    QUEUE_SIZE_MAX = 64
+    # Maximal time to wait for a room in the queue.
+    STALL_TIMEOUT = 5
+
+    def __init__(self, fd: int, mtu: int, close_callback: Callable[[], None] | None = None):
+        # Duplicate the file descriptor to avoid closing
+        # the file descriptor by the D-Bus library.
+        self.sock = socket.socket(fileno=os.dup(fd))
+        self.sock.setblocking(False)
+        self.close_callback = close_callback
+        self.mtu = mtu
+
+        self.queue: deque[bytes] = deque()
+        self.queue_not_full = asyncio.Event()
+        self.queue_not_full.set()
+
+        # Number of times the socket was not writable and the total stall time.
+        self.stalls = 0
+        self.stall_time = 0.0
+        self._stall_start = None
+
+        self._loop = asyncio.get_running_loop()
+
+    def __str__(self):
+        return f"writer[{self.sock.fileno()}]"
+
+    @property
+    def closed(self) -> bool:
+        return self.sock.fileno() == -1
+
+    async def write(self, data: bytes):
+        """Queue data for sending, waiting if the queue is full."""
+        async with asyncio.timeout(self.STALL_TIMEOUT):
+            while len(self.queue) >= self.QUEUE_SIZE_MAX:
+                self.queue_not_full.clear()
+                await self.queue_not_full.wait()
+        if not self.closed:
+            self.queue.append(data)
+            if self._stall_start is None:
+                self.__flush()
+        if self.closed:
+            msg = "Socket closed by the GATT server"
+            raise ConnectionError(msg)
+
+    def close(self):
+        if self.closed:
+            return
+        logger.debug("Closing %s", self)
+        if self._stall_start is not None:
+            self._loop.remove_writer(self.sock)
+        self.sock.close()
+        self.queue.clear()
+        # Wake up all writers waiting for the room in the queue.
+        self.queue_not_full.set()
+        if self.close_callback is not None:
+            self.close_callback()
+
+    def __flush(self):
+        while self.queue:
+            try:
+                self.sock.send(self.queue[0])
+            except BlockingIOError:
+                if self._stall_start is None:
+                    self._stall_start = self._loop.time()
+                    self.stalls += 1
+                    self._loop.add_writer(self.sock, self.__flush)
+                return
+            except OSError:
+                self.close()
+                return
+            self.queue.popleft()
+            self.queue_not_full.set()
+        if self._stall_start is not None:
+            stall_time = self._loop.time() - self._stall_start
+            logger.debug("Unblocked %s after %.3f seconds", self, stall_time)
+            self.stall_time += stall_time
+            self._stall_start = None
+            self._loop.remove_writer(self.sock)
@@ -4,7 +4,7 @@
 import sdbus
 
 from ..interfaces.GattService import GattServiceInterface
-from ..utils import BluetoothUUID, DBusClientMixin, dbus_property_async_except_logging
+from ..utils import BluetoothUUID, DBusClientMixin, DBusServerMixin, properties_snapshot
 
 
 class GattServiceClient(DBusClientMixin, GattServiceInterface):
@@ -14,39 +14,46 @@ class GattServiceClient(DBusClientMixin, GattServiceInterface):
         super().__init__(service, path)
 
 
-class GattServiceClientLink(GattServiceInterface):
+class GattServiceClientLink(DBusServerMixin, GattServiceInterface):
     """GATT service server linked with a remote client."""
 
     def __init__(self, client: GattServiceClient, device):
         super().__init__()
         self.client = client
         self.device = device
+        # Memoized object path with the handle and the parent's path it was made of.
+        self._path = self._path_handle = self._path_parent = None
+        # Properties of the link mirror properties of the client.
+        properties_snapshot.add_source(self, client)
+
+    async def cleanup(self):
+        pass
 
     def get_object_path(self):
-        handle = hex(self.client.Handle.get())[2:].zfill(4)
-        return f"{self.device.get_object_path()}/service{handle}"
+        # Format the path only if the handle or the parent's path has changed.
+        handle = self.client.Handle.get()
+        parent = self.device.get_object_path()
+        if handle != self._path_handle or parent is not self._path_parent:
+            self._path_handle, self._path_parent = handle, parent
+            self._path = f"{parent}/service{handle:04x}"
+        return self._path
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def UUID(self) -> str:
         return BluetoothUUID(self.client.UUID.get())
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Primary(self) -> bool:
         return self.client.Primary.get()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Device(self) -> str:
         return self.device.get_object_path()
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Includes(self) -> list[str]:
         return self.client.Includes.get([])
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def Handle(self) -> int:
         return self.client.Handle.get()
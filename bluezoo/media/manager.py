@@ -8,12 +8,11 @@ import sdbus
 from ..exceptions import DBusBluezDoesNotExistError
 from ..interfaces.Media import MediaInterface
 from ..log import logger
-from ..utils import (BluetoothUUID, dbus_method_async_except_logging,
-                     dbus_property_async_except_logging)
+from ..utils import BluetoothUUID, DBusServerMixin
 from .endpoint import MediaEndpointClient
 
 
-class MediaManager(MediaInterface):
+class MediaManager(DBusServerMixin, MediaInterface):
     """Media manager."""
 
     def __init__(self, adapter):
@@ -32,7 +31,6 @@ class MediaManager(MediaInterface):
         await endpoint.cleanup()
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RegisterEndpoint(self, path: str,
                                properties: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
@@ -49,7 +47,6 @@ class MediaManager(MediaInterface):
         self.endpoints[sender, path] = endpoint
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def UnregisterEndpoint(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to unregister media endpoint %s", sender, path)
@@ -61,7 +58,6 @@ class MediaManager(MediaInterface):
         raise DBusBluezDoesNotExistError(msg)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RegisterApplication(self, path: str,
                                   options: dict[str, tuple[str, Any]]) -> None:
         sender = sdbus.get_current_message().sender
@@ -69,18 +65,15 @@ class MediaManager(MediaInterface):
         assert sender is not None, "D-Bus message sender is None"
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def UnregisterApplication(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to unregister media application %s", sender, path)
         assert sender is not None, "D-Bus message sender is None"
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedUUIDs(self) -> list[str]:
         return [BluetoothUUID("0000110a"), BluetoothUUID("0000110b")]
 
     @sdbus.dbus_property_async_override()
-    @dbus_property_async_except_logging
     def SupportedFeatures(self) -> list[str]:
         return []
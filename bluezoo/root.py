@@ -1,18 +1,26 @@
 # SPDX-FileCopyrightText: 2025 BlueZoo developers
 # SPDX-License-Identifier: GPL-2.0-only
 
+from typing import ClassVar
+
 import sdbus
 
 from .exceptions import DBusBluezAlreadyExistsError, DBusBluezDoesNotExistError
 from .interfaces.Agent import AgentInterface
 from .interfaces.AgentManager import AgentManagerInterface
 from .log import logger
-from .utils import DBusClientMixin, create_background_task, dbus_method_async_except_logging
+from .utils import DBusClientMixin, DBusServerMixin, create_background_task
 
 
 class AgentClient(DBusClientMixin, AgentInterface):
     """D-Bus client for the Agent interface."""
 
+    # Agent requests might wait for the user interaction, so they are given
+    # the same time as BlueZ gives them (see REQUEST_TIMEOUT in src/agent.c).
+    CALL_TIMEOUTS: ClassVar[dict[str, float]] = dict.fromkeys((
+        "RequestPinCode", "DisplayPinCode", "RequestPasskey", "RequestConfirmation",
+        "RequestAuthorization", "AuthorizeService"), 60)
+
     def __init__(self, service, path, capability: str, service_lost_callback):
         super().__init__(service, path, service_lost_callback)
         self.capability = capability
@@ -21,7 +29,7 @@ class AgentClient(DBusClientMixin, AgentInterface):
         return f"agent[{self.capability}]"
 
 
-class RootManager(AgentManagerInterface):
+class RootManager(DBusServerMixin, AgentManagerInterface):
 
     def __init__(self, mock):
         super().__init__()
@@ -32,6 +40,12 @@ class RootManager(AgentManagerInterface):
         # Agents registered by the clients.
         self.agents: dict[str, AgentClient] = {}
 
+    async def cleanup(self):
+        for agent in self.agents.values():
+            await agent.cleanup()
+        self.agents.clear()
+        self.agent = None
+
     def get_object_path(self):
         return "/org/bluez"
 
@@ -54,7 +68,6 @@ class RootManager(AgentManagerInterface):
                 create_background_task(adapter.Pairable.set_async(False))
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RegisterAgent(self, path: str, capability: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to register agent %s", sender, path)
@@ -83,7 +96,6 @@ class RootManager(AgentManagerInterface):
                 create_background_task(adapter.Pairable.set_async(True))
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def UnregisterAgent(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to unregister agent %s", sender, path)
@@ -95,7 +107,6 @@ class RootManager(AgentManagerInterface):
         raise DBusBluezDoesNotExistError(msg)
 
     @sdbus.dbus_method_async_override()
-    @dbus_method_async_except_logging
     async def RequestDefaultAgent(self, path: str) -> None:
         sender = sdbus.get_current_message().sender
         logger.debug("Client %s requested to set %s as default agent", sender, path)
@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import configparser
+import contextlib
+import os
+
+from .log import logger
+from .utils import create_background_task
+
+
+class DeviceInfo:
+    """Pairing and trust state of a remote device."""
+
+    # Names of the stored attributes of a Device object.
+    ATTRIBUTES = ("paired", "bonded", "trusted", "blocked")
+
+    def __init__(self, name: str = "", paired: bool = False, bonded: bool = False,
+                 trusted: bool = False, blocked: bool = False):
+        self.name = name
+        self.paired = paired
+        self.bonded = bonded
+        self.trusted = trusted
+        self.blocked = blocked
+
+    def __eq__(self, other):
+        return isinstance(other, DeviceInfo) and vars(self) == vars(other)
+
+
+class Storage:
+    """Persistent storage of adapters and devices.
+
+    The layout follows the BlueZ storage directory (e.g. /var/lib/bluetooth),
+    with a sub-directory for every adapter, named after its address:
+
+      <path>/<adapter>/<device>/info   - pairing and trust state of a device
+
+    Device information is saved with a write-behind policy: changes are
+    collected in memory and written to the disk (in a worker thread) once
+    the write delay expires, so bursts of changes result in a single write
+    per device.
+    """
+
+    # Time to collect device changes before writing them to the disk.
+    WRITE_DELAY = 1.0
+
+    def __init__(self, path: str):
+        self.path = path
+        # Device information waiting to be written (None means removal).
+        self._pending: dict[tuple[str, str], DeviceInfo | None] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_lock = asyncio.Lock()
+
+    def __str__(self):
+        return f"storage[{self.path}]"
+
+    def __write(self, path: str, config: configparser.ConfigParser):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, so the file is never left truncated.
+        with open(f"{path}.tmp", "w") as f:
+            config.write(f, space_around_delimiters=False)
+        os.replace(f"{path}.tmp", path)
+
+    def get_device_info_path(self, adapter: str, device: str) -> str:
+        return os.path.join(self.path, adapter, device, "info")
+
+    async def load_devices(self, adapter: str) -> dict[str, DeviceInfo]:
+        """Load information about all devices stored for the adapter."""
+        # Do not read the disk while pending changes are being written.
+        async with self._flush_lock:
+            devices = await asyncio.to_thread(self.__read_devices, adapter)
+        # Include changes which were not written yet.
+        for (adapter_, device), info in self._pending.items():
+            if adapter_ == adapter:
+                if info is None:
+                    devices.pop(device, None)
+                else:
+                    devices[device] = info
+        return devices
+
+    def __read_devices(self, adapter: str) -> dict[str, DeviceInfo]:
+        devices = {}
+        try:
+            entries = os.listdir(os.path.join(self.path, adapter))
+        except FileNotFoundError:
+            entries = []
+        for device in entries:
+            path = self.get_device_info_path(adapter, device)
+            config = configparser.ConfigParser(interpolation=None)
+            try:
+                if not config.read(path):
+                    continue
+                devices[device] = DeviceInfo(
+                    config.get("General", "Name", fallback=""),
+                    *(config.getboolean("General", x, fallback=False)
+                      for x in DeviceInfo.ATTRIBUTES))
+            except (OSError, ValueError, configparser.Error) as e:
+                logger.warning("Cannot load device info %s: %s", path, e)
+        return devices
+
+    def save_device(self, adapter: str, device: str, info: DeviceInfo | None):
+        """Schedule write of the device information (or removal if None)."""
+        self._pending[adapter, device] = info
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(
+                self.WRITE_DELAY, lambda: create_background_task(self.flush()))
+
+    async def flush(self):
+        """Write all pending device information to the disk."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            logger.debug("Writing %d device(s) to %s", len(pending), self)
+            await asyncio.to_thread(self.__write_devices, pending)
+
+    def __write_devices(self, pending: dict[tuple[str, str], DeviceInfo | None]):
+        for (adapter, device), info in pending.items():
+            path = self.get_device_info_path(adapter, device)
+            try:
+                if info is None:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(path)
+                    continue
+                config = configparser.ConfigParser(interpolation=None)
+                config.optionxform = str
+                config["General"] = {"Name": info.name}
+                config["General"].update(
+                    (x.capitalize(), str(getattr(info, x)).lower())
+                    for x in DeviceInfo.ATTRIBUTES)
+                self.__write(path, config)
+            except OSError as e:
+                logger.warning("Cannot write device info %s: %s", path, e)
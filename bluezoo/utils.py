@@ -2,19 +2,26 @@
 # SPDX-License-Identifier: GPL-2.0-only
 
 import asyncio
+import contextlib
+import inspect
 import re
+import time
 import weakref
-from collections.abc import Callable
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable
 from enum import IntFlag
-from functools import wraps
-from typing import Literal
+from functools import cache, lru_cache, partial
+from typing import Any, ClassVar, Literal
 
 import sdbus
 from sdbus.dbus_proxy_async_interfaces import DbusInterfaceCommonAsync
+from sdbus.dbus_proxy_async_method import DbusLocalMethodAsync, DbusMethodAsync
 from sdbus.dbus_proxy_async_property import (DbusLocalPropertyAsync, DbusPropertyAsync,
                                              DbusProxyPropertyAsync, DbusRemoteObjectMeta)
 from sdbus.utils import parse_properties_changed
 
+from . import events
+from .exceptions import DBusBluezFailedError
 from .log import logger
 
 
@@ -45,46 +52,441 @@ def create_background_task(coroutine):
 create_background_task.tasks = set()
 
 
+async def map_with_concurrency(func: Callable[[Any], Awaitable], items: Iterable,
+                               limit: int) -> list:
+    """Await func for every item, running at most limit calls concurrently.
+
+    Results are returned in the order of items. If any call fails, all other
+    calls are cancelled and the exception of the first failed call is raised.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(run(x)) for x in items]
+    except ExceptionGroup as e:
+        raise e.exceptions[0] from None
+    return [x.result() for x in tasks]
+
+
+class Latency:
+    """Accumulate latency samples (in seconds)."""
+
+    __slots__ = ("count", "max", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __str__(self):
+        return f"{self.mean * 1000:.3f} ms (max {self.max * 1000:.3f} ms, n={self.count})"
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+
+# Marker of a property which value was not cached yet.
+_NOT_CACHED = object()
+
+
 class DBusPropertyAsyncProxyBindWithCache(DbusProxyPropertyAsync):
+    """Property of a remote object bound with the cached value.
+
+    The bound property is created once per object (see DBusClientMixin),
+    so reading the cached value does not allocate anything.
+    """
+
+    __slots__ = ("local_object_ref", "value")
 
     def __init__(self, dbus_property, local_object, proxy_meta):
         super().__init__(dbus_property, proxy_meta)
         self.local_object_ref = weakref.ref(local_object)
-        if not hasattr(local_object, "_cache"):
-            local_object._cache = {}
+        self.value = _NOT_CACHED
 
     def cache(self, value):
         """Cache the property value."""
-        local_object = self.local_object_ref()
-        property_name = self.dbus_property.property_name
-        local_object._cache[property_name] = value
+        self.value = value
+        # Local objects mirroring this one have to re-read the value.
+        properties_snapshot.invalidate_source(self.local_object_ref())
 
     def get(self, default=None):
         """Return the property value or the default value."""
-        local_object = self.local_object_ref()
-        property_name = self.dbus_property.property_name
-        return local_object._cache.get(property_name, default)
+        if (value := self.value) is _NOT_CACHED:
+            return default
+        return value
 
     async def set_async(self, value):
-        await super().set_async(value)
+        local_object = self.local_object_ref()
+        if isinstance(local_object, DBusClientMixin):
+            await local_object.call_with_deadline(
+                f"{self.dbus_property.property_name}.Set", super().set_async, value)
+        else:
+            await super().set_async(value)
         self.cache(value)
 
 
-def DbusPropertyAsync__get__(self, obj, obj_class):
-    if obj is None:
-        return self
-    dbus_meta = obj._dbus
-    if isinstance(dbus_meta, DbusRemoteObjectMeta):
-        return DBusPropertyAsyncProxyBindWithCache(self, obj, dbus_meta)
-    return DbusLocalPropertyAsync(self, obj)
+class PropertiesChangedCoalescer:
+    """Coalesce PropertiesChanged signals of local objects.
+
+    Property changes are collected per object and interface, and emitted as
+    a single PropertiesChanged signal on the next event loop iteration. Objects
+    are flushed in the order in which they were changed for the first time.
+    """
+
+    def __init__(self):
+        self.pending: dict[Any, dict[str, dict[str, tuple[str, Any]]]] = {}
+        self._handle: asyncio.Handle | None = None
+
+    def add(self, obj, interface: str, name: str, signature: str, value: Any):
+        """Add the property change to the pending signal of the object."""
+        self.pending.setdefault(obj, {}).setdefault(interface, {})[name] = signature, value
+        if self._handle is None:
+            self._handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self, obj=None):
+        """Emit pending signals of the given object (or all objects)."""
+        if obj is None:
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+            pending, self.pending = self.pending, {}
+        elif obj in self.pending:
+            pending = {obj: self.pending.pop(obj)}
+        else:
+            return
+        for obj, interfaces in pending.items():
+            for interface, changes in interfaces.items():
+                try:
+                    obj.properties_changed.emit((interface, changes, []))
+                except Exception:
+                    logger.exception("Cannot emit properties changed of %s", interface)
+
+
+# Global coalescer for all local D-Bus objects.
+properties_changed_coalescer = PropertiesChangedCoalescer()
+
+
+class PropertiesSnapshot:
+    """Snapshot of property values of exported local objects.
+
+    The sd-bus library calls property getters whenever the properties are
+    read, e.g. GetManagedObjects on the root object reads every property of
+    every exported object. Values returned by getters are kept in a snapshot,
+    so subsequent reads are served without calling the getters again.
+
+    The snapshot of an object is dropped when any of its properties changes
+    (getters of the same object might depend on each other), when the object
+    is removed from D-Bus, or when a property of its source object changes.
+    """
+
+    def __init__(self):
+        self.objects: dict[Any, dict[DbusPropertyAsync, Any]] = {}
+        # Local objects indexed by the (remote) object they mirror.
+        self.sources: weakref.WeakKeyDictionary[Any, weakref.WeakSet] = weakref.WeakKeyDictionary()
+
+    def get(self, obj, dbus_property: DbusPropertyAsync) -> Any:
+        """Return the property value, calling the getter if not in the snapshot."""
+        if (values := self.objects.get(obj)) is None:
+            values = self.objects[obj] = {}
+        try:
+            return values[dbus_property]
+        except KeyError:
+            value = values[dbus_property] = dbus_property.property_getter(obj)
+            return value
+
+    def add_source(self, obj, source):
+        """Drop the snapshot of the object whenever the source changes."""
+        self.sources.setdefault(source, weakref.WeakSet()).add(obj)
+
+    def invalidate(self, obj):
+        """Drop the snapshot of the object."""
+        self.objects.pop(obj, None)
+
+    def invalidate_source(self, source):
+        """Drop snapshots of all objects mirroring the source."""
+        for obj in self.sources.get(source, ()):
+            self.objects.pop(obj, None)
+
+
+# Global property snapshot of all local D-Bus objects.
+properties_snapshot = PropertiesSnapshot()
+
+
+class DBusPropertyAsyncLocalBindCoalesced(DbusLocalPropertyAsync):
+
+    async def set_async(self, value, coalesce: bool = True):
+        """Set the property value.
+
+        The PropertiesChanged signal is coalesced with other changes of the
+        object made within the same event loop iteration. Use coalesce=False
+        if the intermediate state has to be emitted in order (e.g. state
+        machine transitions), in which case the signal is emitted right away.
+        """
+        local_object = self.local_object_ref()
+        properties_snapshot.invalidate(local_object)
+        if not coalesce:
+            # Emit pending changes first, to preserve the order.
+            properties_changed_coalescer.flush(local_object)
+            await super().set_async(value)
+            return
+        self.dbus_property.property_setter(local_object, value)
+        properties_changed_coalescer.add(
+            local_object,
+            self.dbus_property.interface_name,
+            self.dbus_property.property_name,
+            self.dbus_property.property_signature,
+            value)
+
+    # Methods below override private handlers of the Get, GetAll and Set
+    # requests of the sdbus.DbusLocalPropertyAsync (as of sdbus 0.14), so
+    # they have to be revisited when updating the sdbus dependency.
+
+    def _dbus_reply_get(self, message):
+        try:
+            value = properties_snapshot.get(self.local_object_ref(), self.dbus_property)
+        except sdbus.SdBusBaseError:
+            raise  # Propagate D-Bus errors without logging.
+        except Exception:
+            logger.exception("Error in D-Bus property %s", self.dbus_property.property_name)
+            raise
+        message.append_data(self.dbus_property.property_signature, value)
+
+    def _dbus_reply_set(self, message):
+        super()._dbus_reply_set(message)
+        properties_snapshot.invalidate(self.local_object_ref())
+
+
+class DBusLocalMethodAsyncExceptLogging(DbusLocalMethodAsync):
+
+    # Override of the private method of the sdbus.DbusLocalMethodAsync (as of
+    # sdbus 0.14), which has to be revisited when updating the dependency.
+    async def _dbus_reply_call_method(self, request_message, local_object):
+        try:
+            return await super()._dbus_reply_call_method(request_message, local_object)
+        except sdbus.SdBusBaseError:
+            raise  # Propagate D-Bus errors without logging.
+        except Exception:
+            logger.exception("Error in D-Bus method %s", self.dbus_method.method_name)
+            raise
+
+
+@cache
+def _get_dbus_properties(cls: type) -> tuple[tuple[str, DbusPropertyAsync], ...]:
+    """Get names and descriptors of all D-Bus properties of the interface class."""
+    return tuple((name, prop) for name in dir(cls)
+                 if isinstance(prop := inspect.getattr_static(cls, name), DbusPropertyAsync))
+
+
+class DBusServerMixin(DbusInterfaceCommonAsync):
+    """Helper class for D-Bus objects served by BlueZoo.
+
+    D-Bus properties of the object are bound once, when the object is created,
+    and the bound properties coalesce PropertiesChanged signals and serve reads
+    from the property snapshot (see DBusPropertyAsyncLocalBindCoalesced).
+
+    Exceptions raised by D-Bus methods and property getters, other than D-Bus
+    errors, are logged when the method is called or the property is read via
+    D-Bus. Direct calls from BlueZoo code are not wrapped in any way.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # Shadow the method and property descriptors of the class.
+        for name in _get_dbus_methods(type(self)):
+            method = inspect.getattr_static(type(self), name)
+            setattr(self, name, DBusLocalMethodAsyncExceptLogging(method, self))
+        for name, prop in _get_dbus_properties(type(self)):
+            setattr(self, name, DBusPropertyAsyncLocalBindCoalesced(prop, self))
+
+
+class DBusClientCircuitBreaker:
+    """Fail calls to a D-Bus service fast after repeated timeouts.
+
+    After FAILURES_MAX consecutive timeouts the breaker opens and all calls
+    fail right away. Once the RESET_TIMEOUT expires, a single trial call is
+    let through (half-open state), while other calls still fail until the
+    trial call either closes the breaker or opens it again.
+    """
+
+    FAILURES_MAX = 3
+    RESET_TIMEOUT = 30
+
+    def __init__(self):
+        self.failures = 0
+        self.opened: float | None = None
+        # Whether the trial call is in flight.
+        self.trial = False
 
+    @property
+    def is_open(self) -> bool:
+        if self.opened is None:
+            return False
+        if self.trial or time.monotonic() - self.opened < self.RESET_TIMEOUT:
+            return True
+        # Let one trial call through (half-open state).
+        self.trial = True
+        return False
+
+    def failure(self):
+        self.trial = False
+        self.failures += 1
+        if self.failures >= self.FAILURES_MAX:
+            self.opened = time.monotonic()
+
+
+class DBusServiceWatcher:
+    """Watch D-Bus services with live registrations for disconnection.
+
+    Instead of receiving every NameOwnerChanged signal on the bus, the watcher
+    asks the D-Bus daemon for signals of watched services only, by installing
+    a match rule with the arg0 filter for every watched service. The rule is
+    removed when the last registration of the service goes away. When the
+    service disconnects, the ServiceLost event is emitted.
+    """
+
+    RULE = ("type='signal',sender='org.freedesktop.DBus',path='/org/freedesktop/DBus',"
+            "interface='org.freedesktop.DBus',member='NameOwnerChanged'")
+
+    # Time to wait for the watcher to be ready (in seconds).
+    READY_TIMEOUT = 5
 
-# Monkey-patch the library to support property caching.
-DbusPropertyAsync.__get__ = DbusPropertyAsync__get__
+    def __init__(self):
+        # Number of live registrations indexed by the service name.
+        self.watched: Counter[str] = Counter()
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Pending updates of match rules.
+        self._updates: set[asyncio.Task] = set()
+
+    def start(self):
+        """Start watching services on the default bus."""
+        self.watched.clear()
+        self._lock = asyncio.Lock()
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self.__watch_task())
+
+    async def stop(self):
+        """Stop watching services and cancel pending updates of match rules."""
+        tasks = [*self._updates]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __call(self, method: str, *args):
+        bus = sdbus.get_default_bus()
+        message = bus.new_method_call_message(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", method)
+        for arg in args:
+            message.append_data("s", arg)
+        return (await bus.call_async(message)).get_contents()
+
+    def __update(self, method: str, service: str):
+        task = asyncio.create_task(self.__update_match(method, service))
+        self._updates.add(task)
+        task.add_done_callback(self._updates.discard)
+
+    async def __update_match(self, method: str, service: str):
+        async with self._lock:
+            try:
+                async with asyncio.timeout(self.READY_TIMEOUT):
+                    await self._ready.wait()
+            except TimeoutError:
+                logger.warning("Cannot update match rule of %s: watcher not ready", service)
+                return
+            try:
+                await self.__call(method, f"{self.RULE},arg0='{service}'")
+                # The service might have disconnected before the rule was added.
+                if method == "AddMatch" and not await self.__call("NameHasOwner", service):
+                    self.__lost(service)
+            except sdbus.SdBusBaseError as e:
+                logger.debug("Cannot update match rule of %s: %s", service, e)
+
+    async def __watch_task(self):
+        queue: asyncio.Queue = asyncio.Queue()
+        slot = await sdbus.get_default_bus().match_signal_async(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+            "NameOwnerChanged", queue.put_nowait)
+        try:
+            # The sd-bus library asked the daemon for all NameOwnerChanged
+            # signals. Remove that rule, so only signals matching rules of
+            # watched services are delivered to our local match slot.
+            with contextlib.suppress(sdbus.SdBusBaseError):
+                await self.__call("RemoveMatch", self.RULE)
+            self._ready.set()
+            while True:
+                _, old, new = (await queue.get()).get_contents()
+                if old and not new:
+                    self.__lost(old)
+        finally:
+            slot.close()
+
+    def __lost(self, service: str):
+        if self.watched.pop(service, None) is None:
+            return
+        logger.debug("D-Bus service %s lost", service)
+        self.__update("RemoveMatch", service)
+        events.emit(events.ServiceLost(service))
+
+    def watch(self, service: str):
+        """Add registration of the service."""
+        self.watched[service] += 1
+        if self.watched[service] == 1:
+            self.__update("AddMatch", service)
+
+    def unwatch(self, service: str):
+        """Remove registration of the service."""
+        if service not in self.watched:
+            return
+        self.watched[service] -= 1
+        if not self.watched[service]:
+            del self.watched[service]
+            self.__update("RemoveMatch", service)
+
+
+# Global watcher of D-Bus services.
+service_watcher = DBusServiceWatcher()
+
+
+@cache
+def _get_dbus_methods(cls: type) -> tuple[str, ...]:
+    """Get names of all D-Bus methods of the interface class."""
+    return tuple(name for name in dir(cls)
+                 if isinstance(inspect.getattr_static(cls, name), DbusMethodAsync))
 
 
 class DBusClientMixin(DbusInterfaceCommonAsync):
-    """Helper class for D-Bus client objects."""
+    """Helper class for D-Bus client objects.
+
+    All D-Bus method calls made with the client object are bounded by the
+    deadline given in CALL_TIMEOUTS for the called method, or by the default
+    CALL_TIMEOUT deadline. Calls to a D-Bus service which repeatedly misses
+    deadlines fail fast (see DBusClientCircuitBreaker).
+    """
+
+    # Deadline for D-Bus calls made to the client (in seconds).
+    CALL_TIMEOUT = 10
+    # Deadlines of particular D-Bus methods (in seconds).
+    CALL_TIMEOUTS: ClassVar[dict[str, float]] = {}
+
+    # Circuit breakers of D-Bus services which missed deadlines.
+    circuit_breakers: ClassVar[dict[str, DBusClientCircuitBreaker]] = {}
+    # Number of missed deadlines per D-Bus interface member.
+    deadlines_exceeded: ClassVar[Counter[str]] = Counter()
 
     def __init__(self, service: str, path: str,
                  service_lost_callback: Callable | None = None):
@@ -92,23 +494,63 @@ class DBusClientMixin(DbusInterfaceCommonAsync):
         # Connect our client object to the D-Bus service.
         self._proxify(service, path)
 
+        # Shadow D-Bus methods with calls bounded by the deadline.
+        for name in _get_dbus_methods(type(self)):
+            setattr(self, name, partial(self.call_with_deadline, name, getattr(self, name)))
+        # Shadow D-Bus properties with properties bound with the cached value.
+        for name, prop in _get_dbus_properties(type(self)):
+            setattr(self, name, DBusPropertyAsyncProxyBindWithCache(prop, self, self._dbus))
+
         self._properties_changed_task = NoneTask()
         self._service_lost_subscription = None
 
         if service_lost_callback is not None:
-            from .events import subscribe
-            self._service_lost_subscription = subscribe(
-                f"service:lost:{self.get_client()}", service_lost_callback, once=True)
+            self._service_lost_subscription = events.subscribe(
+                events.ServiceLost, self.get_client(), lambda _: service_lost_callback(),
+                once=True)
+            service_watcher.watch(self.get_client())
 
     async def cleanup(self):
         if self._service_lost_subscription is not None:
             self._service_lost_subscription.unsubscribe()
+            service_watcher.unwatch(self.get_client())
         self._properties_changed_task.cancel()
 
+    async def call_with_deadline(self, name: str, func: Callable[..., Awaitable],
+                                 *args, **kwargs):
+        """Call the D-Bus service with the deadline of the given method."""
+        service = self.get_client()
+        breaker = self.circuit_breakers.get(service)
+        if breaker is not None and breaker.is_open:
+            msg = f"Service {service} is not responding"
+            raise DBusBluezFailedError(msg)
+        trial = breaker is not None and breaker.trial
+        try:
+            async with asyncio.timeout(self.CALL_TIMEOUTS.get(name, self.CALL_TIMEOUT)):
+                result = await func(*args, **kwargs)
+        except sdbus.SdBusBaseError:
+            # Service is responding, so there is no need to keep the breaker.
+            self.circuit_breakers.pop(service, None)
+            raise
+        except TimeoutError:
+            key = f"{self.__class__.__name__}.{name}"
+            self.deadlines_exceeded[key] += 1
+            logger.warning("Call %s of %s timed out (%d times)",
+                           key, service, self.deadlines_exceeded[key])
+            self.circuit_breakers.setdefault(service, DBusClientCircuitBreaker()).failure()
+            msg = "Operation timed out"
+            raise DBusBluezFailedError(msg) from None
+        finally:
+            if trial:
+                # Whatever the outcome of the trial call was (including
+                # cancellation), let the next call try the service.
+                breaker.trial = False
+        # Service is responding, so there is no need to keep the breaker.
+        self.circuit_breakers.pop(service, None)
+        return result
+
     async def properties_setup_sync_task(self):
         """Synchronize cached properties with the D-Bus service."""
-        from .events import emit
-
         properties = await self.properties_get_all_dict()
         for k, v in properties.items():
             getattr(self, k).cache(v)
@@ -120,7 +562,7 @@ class DBusClientMixin(DbusInterfaceCommonAsync):
                 for k, v in parse_properties_changed(interfaces, x).items():
                     getattr(self, k).cache(v)
                     properties[k] = v
-                emit(f"properties:changed:{id(self)}", properties=properties)
+                events.emit(events.PropertiesChanged(self, properties))
 
         self._properties_changed_task = asyncio.create_task(catch_properties_changed())
 
@@ -133,34 +575,6 @@ class DBusClientMixin(DbusInterfaceCommonAsync):
         return self._dbus.object_path
 
 
-def dbus_method_async_except_logging(func):
-    """Decorator that logs exceptions from D-Bus methods."""
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        try:
-            return await func(*args, **kwargs)
-        except sdbus.SdBusBaseError:
-            raise  # Propagate D-Bus errors without logging.
-        except Exception:
-            logger.exception("Error in D-Bus method %s", func.__name__)
-            raise
-    return wrapper
-
-
-def dbus_property_async_except_logging(func):
-    """Decorator that logs exceptions from D-Bus properties."""
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except sdbus.SdBusBaseError:
-            raise  # Propagate D-Bus errors without logging.
-        except Exception:
-            logger.exception("Error in D-Bus property %s", func.__name__)
-            raise
-    return wrapper
-
-
 def setup_default_bus(address: Literal["system", "session"]):
     """Set the default D-Bus bus based on the given address."""
     if address == "system":
@@ -174,20 +588,63 @@ def setup_default_bus(address: Literal["system", "session"]):
     return bus
 
 
-class BluetoothAddress(str):
-    """Validate the given Bluetooth address."""
+class BluetoothAddress(int):
+    """Bluetooth address backed by a 48-bit integer.
+
+    The address can be given as a string (e.g. "00:11:22:33:44:55"), as an
+    integer or as another address, which is returned as is. Hashing, ordering
+    and equality are those of the integer, so an address never compares equal
+    to its string form. The canonical string form (upper-case
+    hexadecimal) and the D-Bus object path fragment (e.g. "00_11_22_33_44_55")
+    of recently used addresses are cached.
+    """
 
     # Disallow user-defined extra attributes.
     __slots__ = ()
 
+    # Maximal number of cached string and path forms.
+    CACHE_SIZE = 4096
+
     __re_address = re.compile(r"^(?:[0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
 
-    def __new__(cls, address: str):
-        if cls.__re_address.match(address) is None:
+    def __new__(cls, address: "str | int | BluetoothAddress"):
+        if type(address) is cls:
+            return address  # Addresses are immutable.
+        if isinstance(address, str):
+            if cls.__re_address.match(address) is None:
+                msg = "Invalid Bluetooth address"
+                raise ValueError(msg)
+            address = int(address.replace(":", ""), 16)
+        elif not isinstance(address, int) or isinstance(address, bool):
+            msg = "Invalid Bluetooth address type"
+            raise TypeError(msg)
+        elif not 0 <= address <= 0xFFFFFFFFFFFF:
             msg = "Invalid Bluetooth address"
             raise ValueError(msg)
         return super().__new__(cls, address)
 
+    @classmethod
+    def range(cls, first: "str | int | BluetoothAddress", count: int):
+        """Iterate over count consecutive addresses starting with the first one."""
+        first = cls(first)
+        return (cls(first + i) for i in range(count))
+
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def __format(value: int, sep: str) -> str:
+        return value.to_bytes(6).hex(sep).upper()
+
+    def __str__(self):
+        return self.__format(self, ":")
+
+    def __repr__(self):
+        return f"BluetoothAddress('{self}')"
+
+    @property
+    def path(self) -> str:
+        """Object path fragment of the address."""
+        return self.__format(self, "_")
+
 
 class BluetoothClass(int):
     """Bluetooth Class of Device."""
@@ -269,21 +726,36 @@ class BluetoothClass(int):
 
 
 class BluetoothUUID(str):
-    """Expand the given Bluetooth UUID to the full 128-bit form."""
+    """Expand the given Bluetooth UUID to the full 128-bit form.
+
+    Recently used UUIDs are interned, so constructing a UUID from the same
+    string returns the same canonical instance without normalizing it again.
+    Constructing a UUID from another UUID returns the given instance as is.
+    """
 
     # Disallow user-defined extra attributes.
     __slots__ = ()
 
+    # Maximal number of interned UUIDs.
+    INTERN_SIZE = 1024
+
     __re_uuid_full = re.compile(
         r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
     __re_uuid_hex = re.compile(r"^(0x)?([0-9a-f]{1,8})$")
 
     def __new__(cls, uuid: str):
+        if type(uuid) is cls:
+            return uuid  # The UUID is already normalized.
+        return cls.__intern(uuid)
+
+    @staticmethod
+    @lru_cache(maxsize=INTERN_SIZE)
+    def __intern(uuid: str) -> "BluetoothUUID":
         uuid = uuid.lower()  # Normalize the UUID to lowercase.
-        if match := cls.__re_uuid_hex.match(uuid):
+        if match := BluetoothUUID.__re_uuid_hex.match(uuid):
             v = hex(int(match.group(2), 16))[2:].zfill(8)
             uuid = v + "-0000-1000-8000-00805f9b34fb"
-        elif not cls.__re_uuid_full.match(uuid):
+        elif not BluetoothUUID.__re_uuid_full.match(uuid):
             msg = "Invalid Bluetooth UUID"
             raise ValueError(msg)
-        return super().__new__(cls, uuid)
+        return str.__new__(BluetoothUUID, uuid)
@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+#
+# This script runs micro-benchmarks of the BlueZoo hot paths. Every benchmark
+# compares the current implementation with the previous (naive) approach, so
+# the gain of a particular optimization can be verified locally.
+#
+# Usage:
+#   > scripts/benchmark.py --list
+#   > scripts/benchmark.py relay --count 100000
+#
+# Benchmarks which require D-Bus run a private D-Bus daemon, so they do not
+# interfere with the system bus.
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from argparse import SUPPRESS, ArgumentParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import sdbus
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    """Register the benchmark function."""
+    BENCHMARKS[func.__name__.removeprefix("benchmark_")] = func
+    return func
+
+
+class DBusNamespace:
+    """Context manager to create an isolated D-Bus session."""
+
+    async def __aenter__(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            "dbus-daemon", "--session", "--print-address",
+            stdout=asyncio.subprocess.PIPE)
+        assert self.proc.stdout is not None, "D-Bus daemon process's stdout is None"
+        self.address = (await self.proc.stdout.readline()).decode().strip()
+        # Export the D-Bus address as a system bus address.
+        os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = self.address
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.proc.terminate()
+        await self.proc.wait()
+
+
+class BlueZooContext:
+    """Run BlueZoo with two adapters and GATT application on the second one."""
+
+    def __init__(self, characteristics: int = 50, gatt_concurrency: int = 16):
+        self.characteristics = characteristics
+        self.gatt_concurrency = gatt_concurrency
+
+    async def __aenter__(self):
+        from bluezoo import bluezoo
+        from bluezoo.device import Device
+
+        await bluezoo.startup(adapters=[
+            bluezoo.BluetoothAddressWithName("00:00:00:11:11:11"),
+            bluezoo.BluetoothAddressWithName("00:00:00:22:22:22")],
+            gatt_concurrency=self.gatt_concurrency)
+        self.service = bluezoo.startup.service
+        self.adapter = self.service.adapters[0]
+
+        # Run GATT application in a subprocess (see gatt_server function).
+        self.app = await asyncio.create_subprocess_exec(
+            sys.executable, __file__, "--gatt-server", str(self.characteristics),
+            stdout=asyncio.subprocess.PIPE)
+        assert self.app.stdout is not None, "GATT server process's stdout is None"
+        # The GATT server reports the time it took to register the application.
+        self.register_time = float(await self.app.stdout.readline())
+
+        self.device = Device(self.service.adapters[1], is_le=True)
+        await self.adapter.add_device(self.device)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        from bluezoo import bluezoo
+        self.app.terminate()
+        await self.app.wait()
+        await bluezoo.shutdown()
+
+
+def report(name: str, count: int, elapsed: float, unit: str = "ops"):
+    print(f"{name:<32} {count / elapsed:>14,.0f} {unit}/s  ({elapsed:.3f} s)")
+
+
+def socket_producer(sock: socket.socket, count: int, size: int):
+    """Send given number of packets to the socket in a separate thread."""
+    def producer():
+        packet = bytes(size)
+        for _ in range(count):
+            sock.send(packet)
+    thread = threading.Thread(target=producer)
+    thread.start()
+    return thread
+
+
+async def socket_consumer(sock: socket.socket, count: int, size: int):
+    """Receive given number of packets from the socket in a separate thread."""
+    def consumer():
+        for _ in range(count):
+            sock.recv(size)
+    await asyncio.to_thread(consumer)
+
+
+@benchmark
+async def benchmark_relay(count: int = 100000):
+    """Notifications per second through the acquired socket."""
+    from bluezoo.gatt.relay import GattSocketRelay
+
+    loop = asyncio.get_running_loop()
+    mtu = 23
+
+    # Previous approach: read every packet into a new bytes object
+    # with a file object and write it to the destination socket.
+    server, upstream = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    downstream, client = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    f_read = open(os.dup(upstream.fileno()), "rb", buffering=0)  # noqa: ASYNC230, SIM115
+
+    def reader():
+        if data := f_read.read(mtu):
+            downstream.send(data)
+
+    loop.add_reader(f_read, reader)
+    start = time.perf_counter()
+    thread = socket_producer(server, count, mtu)
+    await socket_consumer(client, count, mtu)
+    report("bytes copy", count, time.perf_counter() - start, "notifications")
+    loop.remove_reader(f_read)
+    thread.join()
+    for x in (f_read, server, upstream, downstream, client):
+        x.close()
+
+    # Current approach: socket relay with a preallocated buffer.
+    server, upstream = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    relay = GattSocketRelay(upstream.fileno(), mtu)
+    client = socket.socket(fileno=os.dup(relay.get_remote_fd()))
+    start = time.perf_counter()
+    thread = socket_producer(server, count, mtu)
+    await socket_consumer(client, count, mtu)
+    report("socket relay", count, time.perf_counter() - start, "notifications")
+    thread.join()
+    relay.close()
+    for x in (server, upstream, client):
+        x.close()
+
+
+@benchmark
+async def benchmark_long_read(count: int = 10000):
+    """Long reads of 512-byte value with 23-byte MTU (with simulated server latency)."""
+    from bluezoo.gatt.procedures import GattLongRead
+
+    value, mtu = bytes(512), 23
+    fetches = 0
+
+    async def fetch(offset):
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0)  # Round trip to the server.
+        return value[offset:]
+
+    async def long_read(read):
+        offset = 0
+        while offset < len(value):
+            offset += len((await read(offset))[:mtu - 1])
+
+    # Previous approach: every read is forwarded to the server.
+    start = time.perf_counter()
+    for _ in range(count):
+        await long_read(fetch)
+    report(f"forward ({fetches // count} fetches)", count, time.perf_counter() - start, "reads")
+
+    # Current approach: long read engine.
+    engine, fetches = GattLongRead(), 0
+    start = time.perf_counter()
+    for _ in range(count):
+        await long_read(lambda x: engine.read("client", x, mtu, lambda: fetch(x)))
+    report(f"long read ({fetches // count} fetches)", count, time.perf_counter() - start, "reads")
+
+
+@benchmark
+async def benchmark_uuid(count: int = 1000000):
+    """Construction of Bluetooth UUIDs from D-Bus strings and UUIDs."""
+    from bluezoo.utils import BluetoothUUID
+
+    # UUIDs as received from D-Bus (plain strings) and already normalized ones.
+    strings = [f"{x:08x}-0000-1000-8000-00805f9b34fb" for x in range(0x1800, 0x1810)]
+    uuids = [BluetoothUUID(x) for x in strings]
+
+    # Previous approach: every construction normalizes and validates the input.
+    normalize = BluetoothUUID._BluetoothUUID__intern.__wrapped__
+    for name, values in (("normalize strings", strings), ("normalize UUIDs", uuids)):
+        start = time.perf_counter()
+        for i in range(count):
+            normalize(values[i % 16])
+        report(name, count, time.perf_counter() - start, "uuids")
+
+    # Current approach: interned instances and pass-through of UUIDs.
+    for name, values in (("interned strings", strings), ("pass-through UUIDs", uuids)):
+        start = time.perf_counter()
+        for i in range(count):
+            BluetoothUUID(values[i % 16])
+        report(name, count, time.perf_counter() - start, "uuids")
+
+
+@benchmark
+async def benchmark_address(count: int = 100000):
+    """Provisioning and lookups of devices keyed by Bluetooth addresses."""
+    import re
+
+    from bluezoo.utils import BluetoothAddress
+
+    # Previous approach: regex-validated string with paths derived on every use.
+    class StrAddress(str):
+        __slots__ = ()
+        __re_address = re.compile(r"^(?:[0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+
+        def __new__(cls, address: str):
+            if cls.__re_address.match(address) is None:
+                raise ValueError(address)
+            return super().__new__(cls, address)
+
+        @property
+        def path(self):
+            return self.replace(":", "_")
+
+    strings = [f"00:00:00:{x >> 16:02X}:{(x >> 8) & 0xFF:02X}:{x & 0xFF:02X}"
+               for x in range(count)]
+    for name, cls in (("string", StrAddress), ("integer", BluetoothAddress)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        devices = {cls(x): None for x in strings}
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0] / count
+        tracemalloc.stop()
+        report(f"{name} addresses ({size:.0f} B/device)", count, elapsed, "devices")
+        # Lookups with equal (but not identical) keys, e.g. addresses from D-Bus.
+        keys = [cls(x) for x in strings]
+        start = time.perf_counter()
+        for key in keys:
+            devices[key]  # noqa: B018
+        report(f"{name} addresses lookup", count, time.perf_counter() - start, "lookups")
+        start = time.perf_counter()
+        for _ in range(10):
+            for key in keys[:1000]:
+                key.path  # noqa: B018
+        report(f"{name} addresses path", 10000, time.perf_counter() - start, "paths")
+
+
+@benchmark
+async def benchmark_events(count: int = 100000):
+    """Delivery of property change events of remote objects."""
+    from bluezoo import events
+
+    # Subscribers of other objects, which should not slow down the delivery.
+    objects = [object() for _ in range(100)]
+    received, done = 0, asyncio.Event()
+
+    def callback(*args, **kwargs):
+        nonlocal received
+        received += 1
+        if received == count:
+            done.set()
+
+    async def async_callback(*args, **kwargs):
+        callback()
+
+    try:
+        # Previous approach: string keys with the pyventus emitter.
+        from pyventus.events import AsyncIOEventEmitter, EventLinker
+        emitter = AsyncIOEventEmitter()
+        for obj in objects:
+            EventLinker.subscribe(f"properties:changed:{id(obj)}", event_callback=async_callback)
+        start = time.perf_counter()
+        for _ in range(count):
+            emitter.emit(f"properties:changed:{id(objects[0])}", properties={})
+        await done.wait()
+        report("pyventus emitter", count, time.perf_counter() - start, "events")
+        EventLinker.remove_all()
+    except ImportError:
+        print("pyventus emitter: not installed")
+
+    # Current approach: typed events indexed by the class and the key.
+    for name, func in (("dispatcher (async)", async_callback), ("dispatcher (sync)", callback)):
+        received, done = 0, asyncio.Event()
+        subscribers = [events.subscribe(events.PropertiesChanged, id(x), func) for x in objects]
+        start = time.perf_counter()
+        for _ in range(count):
+            events.emit(events.PropertiesChanged(objects[0], {}))
+        await done.wait()
+        report(name, count, time.perf_counter() - start, "events")
+        for subscriber in subscribers:
+            subscriber.unsubscribe()
+
+
+@benchmark
+async def benchmark_property_cache(count: int = 1000000):
+    """Reads of cached properties of remote objects."""
+    from sdbus.dbus_proxy_async_property import DbusPropertyAsync
+
+    from bluezoo.gatt.characteristic import GattCharacteristicClient
+    from bluezoo.utils import setup_default_bus
+
+    async with DBusNamespace():
+        setup_default_bus("system")
+        client = GattCharacteristicClient(":1.0", "/char")
+        client.Handle.cache(1)
+        descriptor = type(client).Handle
+
+        def allocated(access) -> float:
+            """Number of bytes allocated per access (not counting the list slot)."""
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            retained = [access() for _ in range(1000)]
+            allocated = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+            del retained
+            return allocated / 1000 - 8
+
+        # Previous approach: a bound property is allocated on every access.
+        def access():
+            return DbusPropertyAsync.__get__(descriptor, client, type(client))
+        start = time.perf_counter()
+        for _ in range(count):
+            access()
+        report(f"bind on access ({allocated(access):.0f} B/read)", count,
+               time.perf_counter() - start, "reads")
+
+        # Current approach: bound property is cached in the object.
+        start = time.perf_counter()
+        for _ in range(count):
+            client.Handle.get()
+        report(f"per-instance bind ({allocated(lambda: client.Handle):.0f} B/read)", count,
+               time.perf_counter() - start, "reads")
+
+
+@benchmark
+async def benchmark_reconnect(count: int = 100):
+    """Latency of reconnecting to a device with GATT services."""
+    async with DBusNamespace(), BlueZooContext() as ctx:
+
+        async def reconnect(cached: bool):
+            elapsed = 0
+            for _ in range(count):
+                if not cached:
+                    ctx.device.gatt_cache.clear()
+                start = time.perf_counter()
+                await ctx.device.connect()
+                elapsed += time.perf_counter() - start
+                await ctx.device.disconnect()
+            return elapsed
+
+        report("resolve on every connect", count, await reconnect(False), "connects")
+        report("cached GATT attributes", count, await reconnect(True), "connects")
+
+
+@benchmark
+async def benchmark_get_all(count: int = 5000):
+    """GetAll calls on a GATT characteristic (with cold property snapshot)."""
+    from bluezoo.device import Device
+    from bluezoo.gatt import GattCharacteristicClientLink, GattServiceClientLink
+    from bluezoo.interfaces.GattCharacteristic import GattCharacteristicInterface
+    from bluezoo.utils import properties_snapshot
+
+    # Previous approach: paths are formatted on every call.
+    def device_path(self):
+        return "/".join((
+            self.adapter.get_object_path(),
+            f"dev_{str(self.address).replace(':', '_')}"))
+
+    def service_path(self):
+        handle = hex(self.client.Handle.get())[2:].zfill(4)
+        return f"{self.device.get_object_path()}/service{handle}"
+
+    def characteristic_path(self):
+        handle = hex(self.client.Handle.get())[2:].zfill(4)
+        return f"{self.service.get_object_path()}/char{handle}"
+
+    async with DBusNamespace(), BlueZooContext() as ctx:
+        await ctx.device.connect()
+        link = next(x for x in ctx.device.services.values()
+                    if isinstance(x, GattCharacteristicClientLink))
+        proxy = GattCharacteristicInterface.new_proxy(
+            "org.bluez", link.get_object_path(), bus=sdbus.sd_bus_open_system())
+
+        async def get_all():
+            start = time.perf_counter()
+            for _ in range(count):
+                properties_snapshot.invalidate(link)
+                await proxy.properties_get_all_dict()
+            return time.perf_counter() - start
+
+        classes = (Device, GattServiceClientLink, GattCharacteristicClientLink)
+        memoized = [x.get_object_path for x in classes]
+        for cls, func in zip(classes, (device_path, service_path, characteristic_path),
+                             strict=True):
+            cls.get_object_path = func
+        report("formatted paths", count, await get_all(), "calls")
+        for cls, func in zip(classes, memoized, strict=True):
+            cls.get_object_path = func
+        # Current approach: paths are memoized.
+        report("memoized paths", count, await get_all(), "calls")
+
+
+@benchmark
+async def benchmark_property_read(count: int = 20000):
+    """Reads of all device properties (with cold property snapshot)."""
+    from functools import wraps
+
+    from bluezoo.utils import _get_dbus_properties, properties_snapshot
+
+    # Previous approach: every getter is wrapped with the logging decorator.
+    def except_logging(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except sdbus.SdBusBaseError:
+                raise
+            except Exception:
+                raise
+        return wrapper
+
+    async with DBusNamespace(), BlueZooContext() as ctx:
+        properties = [x for _, x in _get_dbus_properties(type(ctx.device))]
+
+        def read(get):
+            start = time.perf_counter()
+            for _ in range(count):
+                properties_snapshot.invalidate(ctx.device)
+                for prop in properties:
+                    get(ctx.device, prop)
+            return time.perf_counter() - start
+
+        def get_except_logging(obj, prop):
+            try:
+                return properties_snapshot.get(obj, prop)
+            except sdbus.SdBusBaseError:
+                raise
+            except Exception:
+                raise
+
+        getters = [x.property_getter for x in properties]
+        for prop in properties:
+            prop.property_getter = except_logging(prop.property_getter)
+        report("decorated getters", count * len(properties), read(properties_snapshot.get),
+               "reads")
+        for prop, getter in zip(properties, getters, strict=True):
+            prop.property_getter = getter
+        # Current approach: exceptions are logged by the property get callback.
+        report("logging in get callback", count * len(properties), read(get_except_logging),
+               "reads")
+
+
+@benchmark
+async def benchmark_register(count: int = 1000):
+    """Time of registering GATT application with given number of characteristics."""
+    for concurrency in (1, 16):
+        async with DBusNamespace(), BlueZooContext(count, concurrency) as ctx:
+            report(f"concurrency {concurrency}", count, ctx.register_time, "characteristics")
+
+
+class SignalCounter:
+    """Count ObjectManager signals of the BlueZoo service."""
+
+    def __init__(self):
+        self.bus = sdbus.sd_bus_open_system()
+        self.manager = sdbus.DbusObjectManagerInterfaceAsync.new_proxy(
+            "org.bluez", "/", bus=self.bus)
+        self.added = self.removed = 0
+
+    async def __aenter__(self):
+        async def added():
+            async for _ in self.manager.interfaces_added.catch():
+                self.added += 1
+
+        async def removed():
+            async for _ in self.manager.interfaces_removed.catch():
+                self.removed += 1
+
+        self.tasks = [asyncio.create_task(added()), asyncio.create_task(removed())]
+        await self.sync()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for task in self.tasks:
+            task.cancel()
+        self.bus.close()
+
+    async def sync(self):
+        """Wait for all signals emitted so far (signals precede the reply)."""
+        await self.manager.get_managed_objects()
+        # Let the signal handlers process received signals.
+        await asyncio.sleep(0.01)
+
+    async def count(self, operation) -> tuple[int, int]:
+        await self.sync()
+        self.added = self.removed = 0
+        await operation()
+        await self.sync()
+        return self.added, self.removed
+
+
+@benchmark
+async def benchmark_signals(count: int = 50):
+    """ObjectManager signals when adding adapter and connecting to GATT device."""
+    async with DBusNamespace(), BlueZooContext(count) as ctx, SignalCounter() as counter:
+        from sdbus.dbus_common_elements import DbusLocalObjectMeta
+
+        from bluezoo.adapter import Adapter
+
+        adapter = Adapter(ctx.service, 2, "00:00:00:33:33:33")
+        objects = [(adapter.get_object_path(), x) for x in adapter.get_interfaces()]
+
+        # Get GATT links of the device.
+        await ctx.device.connect()
+        links = [(x.get_object_path(), x) for x in ctx.device.services.values()]
+        await ctx.device.disconnect()
+        for _, obj in links:
+            obj._dbus = DbusLocalObjectMeta()
+
+        # Previous approach: every object is exported with the manager.
+        async def export_with_manager(objects):
+            handles = [ctx.service.manager.export_with_manager(*x) for x in objects]
+            await counter.sync()
+            for handle, (_, obj) in zip(handles, objects, strict=True):
+                handle.stop()
+                obj._dbus = DbusLocalObjectMeta()
+
+        # Current approach: objects are exported and removed at once.
+        async def export_objects(objects):
+            ctx.service.export_objects(objects)
+            await counter.sync()
+            ctx.service.remove_objects(x[1] for x in objects)
+
+        for name, objects in (("adapter", objects), (f"{count} characteristics", links)):
+            for func in (export_with_manager, export_objects):
+                added, removed = await counter.count(lambda: func(objects))
+                print(f"{name + ': ' + func.__name__:<48} "
+                      f"{added:>4} added {removed:>4} removed signals")
+
+
+@benchmark
+async def benchmark_managed_objects(count: int = 1000):
+    """GetManagedObjects calls with connected device with 50 characteristics."""
+    from bluezoo.utils import properties_snapshot
+
+    async with DBusNamespace(), BlueZooContext() as ctx:
+        await ctx.device.connect()
+        manager = sdbus.DbusObjectManagerInterfaceAsync.new_proxy(
+            "org.bluez", "/", bus=sdbus.sd_bus_open_system())
+
+        async def get_managed_objects(snapshot: bool):
+            start = time.perf_counter()
+            for _ in range(count):
+                if not snapshot:
+                    properties_snapshot.objects.clear()
+                await manager.get_managed_objects()
+            return time.perf_counter() - start
+
+        # Previous approach: every property getter is called for every call.
+        report("property getters", count, await get_managed_objects(False), "calls")
+        # Current approach: values are served from the property snapshot.
+        report("property snapshot", count, await get_managed_objects(True), "calls")
+
+
+def gatt_server(characteristics: int):
+    """Run GATT application with one service and given number of characteristics."""
+
+    class GattService(
+            sdbus.DbusInterfaceCommonAsync,
+            interface_name="org.bluez.GattService1"):
+
+        @sdbus.dbus_property_async(property_signature="s")
+        def UUID(self) -> str:
+            return "0000f000-0000-1000-8000-00805f9b34fb"
+
+        @sdbus.dbus_property_async(property_signature="b")
+        def Primary(self) -> bool:
+            return True
+
+    class GattCharacteristic(
+            sdbus.DbusInterfaceCommonAsync,
+            interface_name="org.bluez.GattCharacteristic1"):
+
+        def __init__(self, uuid: str):
+            super().__init__()
+            self.uuid = uuid
+
+        @sdbus.dbus_method_async(input_signature="a{sv}", result_signature="ay")
+        async def ReadValue(self, options: dict[str, tuple[str, object]]) -> bytes:
+            return self.uuid.encode()
+
+        @sdbus.dbus_property_async(property_signature="s")
+        def UUID(self) -> str:
+            return self.uuid
+
+        @sdbus.dbus_property_async(property_signature="o")
+        def Service(self) -> str:
+            return "/srv"
+
+        @sdbus.dbus_property_async(property_signature="as")
+        def Flags(self) -> list[str]:
+            return ["read"]
+
+    from bluezoo.interfaces.GattManager import GattManagerInterface
+    from bluezoo.utils import setup_default_bus
+
+    async def main():
+        setup_default_bus("system")
+        manager = sdbus.DbusObjectManagerInterfaceAsync()
+        manager.export_to_dbus("/")
+        objects = [GattService()]
+        manager.export_with_manager("/srv", objects[0])
+        for i in range(characteristics):
+            objects.append(GattCharacteristic(f"{i + 1:08x}"))
+            manager.export_with_manager(f"/srv/char{i:04x}", objects[-1])
+        gatt = GattManagerInterface.new_proxy("org.bluez", "/org/bluez/hci1")
+        start = time.perf_counter()
+        await gatt.RegisterApplication("/", {})
+        print(time.perf_counter() - start, flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+parser = ArgumentParser(description="BlueZoo micro-benchmarks")
+parser.add_argument("--list", action="store_true",
+                    help="list available benchmarks and exit")
+parser.add_argument("--count", metavar="NUM", type=int,
+                    help="number of iterations; default: benchmark specific")
+parser.add_argument("--gatt-server", metavar="NUM", type=int,
+                    help=SUPPRESS)
+parser.add_argument("benchmarks", metavar="NAME", nargs="*",
+                    help="benchmark to run; default: all")
+
+args = parser.parse_args()
+if args.gatt_server is not None:
+    gatt_server(args.gatt_server)
+    sys.exit(0)
+if args.list:
+    for name, func in BENCHMARKS.items():
+        print(f"{name:<16} {func.__doc__}")
+    sys.exit(0)
+
+loop = asyncio.new_event_loop()
+for name in args.benchmarks or BENCHMARKS:
+    print(f"# {name}: {BENCHMARKS[name].__doc__}")
+    loop.run_until_complete(BENCHMARKS[name](*[args.count] if args.count else []))
@@ -41,6 +41,12 @@ parser.add_argument("--mutate", metavar="SECONDS", type=float,
                     help="mutate the GATT characteristic value repeatedly")
 parser.add_argument("--with-sockets", action="store_true",
                     help="use sockets for communication")
+parser.add_argument("--fail-notify", action="store_true",
+                    help="fail requests to start notifications")
+parser.add_argument("--service-handle", metavar="HANDLE", type=int,
+                    help="export service with the given handle")
+parser.add_argument("--char-handle", metavar="HANDLE", type=int,
+                    help="export characteristic with the given handle")
 
 args = parser.parse_args()
 loop = asyncio.new_event_loop()
@@ -63,6 +69,13 @@ class ServiceInterface(
     def Primary(self) -> bool:
         return args.primary
 
+    if args.service_handle is not None:
+        @sdbus.dbus_property_async(
+            property_signature="q",
+            flags=sdbus.DbusPropertyEmitsChangeFlag)
+        def Handle(self) -> int:
+            return args.service_handle
+
 
 class CharacteristicInterface(
         sdbus.DbusInterfaceCommonAsync,
@@ -145,6 +158,9 @@ class CharacteristicInterface(
         flags=sdbus.DbusUnprivilegedFlag)
     async def StartNotify(self):
         logger.info("Starting characteristic notification")
+        if args.fail_notify:
+            msg = "Failed"
+            raise sdbus.DbusFailedError(msg)
         await self.Notifying.set_async(True)
 
     @sdbus.dbus_method_async(
@@ -210,12 +226,19 @@ class CharacteristicInterface(
     def Flags(self) -> list[str]:
         return args.flag
 
+    if args.char_handle is not None:
+        @sdbus.dbus_property_async(
+            property_signature="q",
+            flags=sdbus.DbusPropertyEmitsChangeFlag)
+        def Handle(self) -> int:
+            return args.char_handle
+
 
 manager = sdbus.DbusObjectManagerInterfaceAsync()
 manager.export_to_dbus("/")
 
 service = ServiceInterface()
-manager.export_with_manager("/srv", service)
+service_handle = manager.export_with_manager("/srv", service)
 
 char = CharacteristicInterface()
 manager.export_with_manager("/srv/char", char)
@@ -242,6 +265,27 @@ async def mutate():
         await char.Value.set_async(char.value)
 
 
+def toggle_service():
+    global service, service_handle
+    if service_handle is not None:
+        # Remove the service, but keep its characteristic exported.
+        service_handle.stop()
+        service_handle = None
+        logger.info("Removed service %s", args.service)
+    else:
+        service = ServiceInterface()
+        service_handle = manager.export_with_manager("/srv", service)
+        logger.info("Added service %s", args.service)
+
+
+def close_notify():
+    if char.f_notify is not None:
+        loop.remove_reader(char.f_notify.fileno())
+        char.f_notify.close()
+        char.f_notify = None
+        logger.info("Closed characteristic notification socket")
+
+
 async def timeout():
     await asyncio.sleep(args.timeout)
     loop.stop()
@@ -251,6 +295,8 @@ loop.run_until_complete(startup())
 t1 = loop.create_task(timeout())
 t2 = loop.create_task(mutate())
 
+loop.add_signal_handler(signal.SIGUSR1, toggle_service)
+loop.add_signal_handler(signal.SIGUSR2, close_notify)
 loop.add_signal_handler(signal.SIGINT, lambda: loop.stop())
 loop.add_signal_handler(signal.SIGTERM, lambda: loop.stop())
 loop.run_forever()
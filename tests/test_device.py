@@ -0,0 +1,365 @@
+#!/usr/bin/env -S python3 -X faulthandler
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import contextlib
+import os
+import signal
+import socket
+import unittest
+from unittest import mock
+
+import sdbus
+import structlog.testing
+from test_client import AsyncProcessContext
+
+from bluezoo import bluezoo, events
+from bluezoo.device import Device
+from bluezoo.gatt import GattCharacteristicClientLink
+from bluezoo.interfaces.AgentManager import AgentManagerInterface
+from bluezoo.interfaces.Device import DeviceInterface
+from bluezoo.interfaces.GattCharacteristic import GattCharacteristicInterface
+
+
+class DeviceTestCase(unittest.IsolatedAsyncioTestCase):
+    """Devices linked with GATT applications, driven without BlueZ client."""
+
+    async def asyncSetUp(self):
+
+        # Start a private D-Bus session and get the address.
+        self._bus = await asyncio.create_subprocess_exec(
+            "dbus-daemon", "--session", "--print-address",
+            stdout=asyncio.subprocess.PIPE)
+        assert self._bus.stdout is not None, "D-Bus daemon process's stdout is None"
+        address = await self._bus.stdout.readline()
+
+        # Force unbuffered output in all Python processes.
+        os.environ["PYTHONUNBUFFERED"] = "1"
+        # Update environment with D-Bus address.
+        os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = address.strip().decode("utf-8")
+
+        # Start mock with three adapters.
+        await bluezoo.startup(
+            adapters=[bluezoo.BluetoothAddressWithName("00:00:00:11:11:11"),
+                      bluezoo.BluetoothAddressWithName("00:00:00:22:22:22"),
+                      bluezoo.BluetoothAddressWithName("00:00:00:33:33:33")])
+        self.mock = bluezoo.startup.service
+        # Connection of remote clients calling linked GATT attributes.
+        self.client_bus = sdbus.sd_bus_open_system()
+
+    async def asyncTearDown(self):
+        await bluezoo.shutdown()
+        self.client_bus.close()
+        self._bus.terminate()
+        await self._bus.wait()
+        # Make sure that all tasks were properly handled. The list shall
+        # contain the asyncTearDown() task only - we are in it right now.
+        self.assertEqual(len(asyncio.all_tasks()), 1)
+
+    async def start_server(self, *args: str) -> AsyncProcessContext:
+        """Run GATT server (see tests/gatt/server.py) on the second adapter."""
+        srv = AsyncProcessContext(await asyncio.create_subprocess_exec(
+            "tests/gatt/server.py", "--adapter=hci1", "--service=0xF100", "--char=0xF110",
+            "--primary", *args,
+            stdout=asyncio.subprocess.PIPE))
+        await srv.expect("Registered service 0xF100 on hci1")
+        return srv
+
+    async def connect(self, adapter: int) -> Device:
+        """Connect the given adapter with the adapter of the GATT server."""
+        device = Device(self.mock.adapters[1], is_le=True)
+        await self.mock.adapters[adapter].add_device(device)
+        await device.connect()
+        return device
+
+    def get_link(self, device: Device) -> GattCharacteristicClientLink:
+        return next(x for x in device.services.values()
+                    if isinstance(x, GattCharacteristicClientLink))
+
+    def get_proxy(self, link: GattCharacteristicClientLink) -> GattCharacteristicInterface:
+        return GattCharacteristicInterface.new_proxy(
+            "org.bluez", link.get_object_path(), self.client_bus)
+
+    async def wait_services(self, device: Device, count: int):
+        """Wait until the device has the given number of linked attributes."""
+        async with asyncio.timeout(1):
+            while len(device.services) != count:  # noqa: ASYNC110
+                await asyncio.sleep(0.01)
+
+    async def wait_value(self, proxy: GattCharacteristicInterface) -> bytes:
+        """Wait for the value notified by the linked characteristic."""
+        async with contextlib.aclosing(proxy.properties_changed.catch()) as signals:
+            async for _, changed, _ in signals:
+                if "Value" in changed:
+                    break
+        return changed["Value"][1]
+
+    async def test_acquire_write_disconnect(self):
+        async with await self.start_server("--flag=write-without-response", "--with-sockets"):
+            device = await self.connect(0)
+            link = self.get_link(device)
+            fd, _ = await self.get_proxy(link).AcquireWrite({})
+            with socket.socket(fileno=fd) as sock:
+                self.assertEqual(len(link.relays), 1)
+                await device.disconnect()
+                # The acquired socket shall be closed when the device disconnects.
+                self.assertEqual(link.relays, set())
+                sock.settimeout(1)
+                self.assertEqual(sock.recv(23), b"")
+
+    async def test_bonded(self):
+        device = Device(self.mock.adapters[1])
+        await self.mock.adapters[0].add_device(device)
+        await device.Bonded.set_async(True)
+        self.assertTrue(device.bonded)
+        self.assertTrue(await device.Bonded.get_async())
+
+    async def test_pair(self):
+        await AgentManagerInterface.new_proxy(
+            "org.bluez", "/org/bluez", self.client_bus).RegisterAgent("/agent", "NoInputNoOutput")
+        # The peer adapter has already discovered our adapter.
+        await self.mock.adapters[1].add_device(Device(self.mock.adapters[0]))
+        proxy = DeviceInterface.new_proxy(
+            "org.bluez", "/org/bluez/hci1/dev_00_00_00_11_11_11", self.client_bus)
+        self.assertFalse(await proxy.Paired.get_async())
+        device = Device(self.mock.adapters[1])
+        await self.mock.adapters[0].add_device(device)
+        await device.pair()
+        # The device on the peer adapter shall be reported as paired.
+        self.assertTrue(await proxy.Paired.get_async())
+        properties = await proxy.properties_get_all_dict()
+        self.assertTrue(properties["Paired"])
+        self.assertTrue(properties["Bonded"])
+        await device.connect()
+        self.assertTrue(await proxy.Connected.get_async())
+
+    async def test_agent_cleanup(self):
+        await AgentManagerInterface.new_proxy(
+            "org.bluez", "/org/bluez", self.client_bus).RegisterAgent("/agent", "NoInputNoOutput")
+        index = events.ServiceLost, next(iter(self.mock.root.agents))
+        self.assertIn(index, events._subscribers)
+        await self.mock.root.cleanup()
+        # The agent shall not be left subscribed after the shutdown.
+        self.assertNotIn(index, events._subscribers)
+        self.assertIsNone(self.mock.root.agent)
+
+    async def test_pair_signals(self):
+        await AgentManagerInterface.new_proxy(
+            "org.bluez", "/org/bluez", self.client_bus).RegisterAgent("/agent", "NoInputNoOutput")
+        device = Device(self.mock.adapters[1])
+        await self.mock.adapters[0].add_device(device)
+        path = device.get_object_path()
+        signals = []
+
+        def callback(message):
+            _, changed, _ = message.get_contents()
+            signals.append([x for x in ("Paired", "Bonded") if x in changed])
+
+        slot = await self.client_bus.match_signal_async(
+            "org.bluez", path, "org.freedesktop.DBus.Properties", "PropertiesChanged", callback)
+        await DeviceInterface.new_proxy("org.bluez", path, self.client_bus).Pair()
+        # State changes shall be signaled one by one before the reply
+        # to the pairing request.
+        self.assertEqual(signals, [["Paired"], ["Bonded"]])
+        slot.close()
+
+    async def test_disconnect(self):
+        async with await self.start_server("--flag=read"):
+            device = await self.connect(0)
+            link = self.get_link(device)
+            manager = sdbus.DbusObjectManagerInterfaceAsync.new_proxy(
+                "org.bluez", "/", self.client_bus)
+            self.assertIn(link.get_object_path(), await manager.get_managed_objects())
+            self.assertTrue(device.services_resolved)
+            await device.disconnect()
+            # Links shall be removed and services marked as not resolved.
+            self.assertNotIn(link.get_object_path(), await manager.get_managed_objects())
+            self.assertEqual(device.services, {})
+            self.assertFalse(device.services_resolved)
+            self.assertFalse(device.peer.services_resolved)
+            # Reconnecting shall export new links for the same attributes.
+            await device.connect()
+            self.assertIsNot(self.get_link(device), link)
+            self.assertEqual(self.get_link(device).get_object_path(), link.get_object_path())
+            self.assertEqual(await self.get_proxy(link).ReadValue({}), b"")
+            self.assertTrue(device.services_resolved)
+
+    async def test_reconnect_cached(self):
+        async with await self.start_server("--flag=read") as srv:
+            device = await self.connect(0)
+            paths = set(device.services)
+            await device.disconnect()
+            with mock.patch.object(Device, "_Device__resolve_links", autospec=True,
+                                   side_effect=Device._Device__resolve_links) as resolve:
+                await device.connect()
+                # Links shall be created without resolving the attributes again.
+                resolve.assert_not_called()
+                self.assertEqual(set(device.services), paths)
+                self.assertEqual(await self.get_proxy(self.get_link(device)).ReadValue({}), b"")
+                await device.disconnect()
+                srv.proc.send_signal(signal.SIGUSR1)
+                await srv.expect("Removed service 0xF100")
+                async with asyncio.timeout(1):
+                    while device.gatt_cache:  # noqa: ASYNC110
+                        await asyncio.sleep(0.01)
+                # Attributes of the changed application shall be resolved again.
+                await device.connect()
+                resolve.assert_called_once()
+                self.assertEqual(device.services, {})
+                srv.proc.send_signal(signal.SIGUSR1)
+                await srv.expect("Added service 0xF100")
+                await self.wait_services(device, 2)
+        # Links of the unregistered application shall be removed.
+        await self.wait_services(device, 0)
+        self.assertEqual(device.gatt_cache, {})
+
+    async def test_service_removed(self):
+        async with await self.start_server("--flag=read") as srv:
+            device = await self.connect(0)
+            manager = sdbus.DbusObjectManagerInterfaceAsync.new_proxy(
+                "org.bluez", "/", self.client_bus)
+            paths = set(device.services)
+            self.assertEqual(len(paths), 2)
+            srv.proc.send_signal(signal.SIGUSR1)
+            await srv.expect("Removed service 0xF100")
+            await self.wait_services(device, 0)
+            # Links of the whole service shall be removed.
+            self.assertFalse(paths & (await manager.get_managed_objects()).keys())
+            srv.proc.send_signal(signal.SIGUSR1)
+            await srv.expect("Added service 0xF100")
+            await self.wait_services(device, 2)
+            link = self.get_link(device)
+            self.assertEqual(set(device.services), paths)
+            self.assertIs(device.services[link.service.get_object_path()], link.service)
+            self.assertEqual(await self.get_proxy(link).ReadValue({}), b"")
+
+    async def test_service_update_failure(self):
+        async with await self.start_server("--flag=read") as srv:
+            device = await self.connect(0)
+            app = next(iter(self.mock.adapters[1].gatt.apps.values()))
+            with (structlog.testing.capture_logs() as logs,
+                  mock.patch.object(Device, "update_services", side_effect=RuntimeError)):
+                srv.proc.send_signal(signal.SIGUSR1)
+                await srv.expect("Removed service 0xF100")
+                async with asyncio.timeout(1):
+                    while "/srv" in app.objects:  # noqa: ASYNC110
+                        await asyncio.sleep(0.01)
+            self.assertIn("Cannot remove object from GATT application /",
+                          [x["event"] for x in logs])
+            # Next updates of the application shall still be processed.
+            srv.proc.send_signal(signal.SIGUSR1)
+            await srv.expect("Added service 0xF100")
+            await self.wait_services(device, 2)
+
+    async def test_connection_signals(self):
+        async with await self.start_server("--flag=read"):
+            device = Device(self.mock.adapters[1], is_le=True)
+            await self.mock.adapters[0].add_device(device)
+            path = device.get_object_path()
+            signals = []
+
+            def callback(message):
+                if message.member == "PropertiesChanged":
+                    _, changed, _ = message.get_contents()
+                    signals.extend(x for x in ("Connected", "ServicesResolved") if x in changed)
+                elif (added := message.get_contents()[0]).startswith(path):
+                    signals.append(added)
+
+            slots = [
+                await self.client_bus.match_signal_async(
+                    "org.bluez", path, "org.freedesktop.DBus.Properties",
+                    "PropertiesChanged", callback),
+                await self.client_bus.match_signal_async(
+                    "org.bluez", "/", "org.freedesktop.DBus.ObjectManager",
+                    "InterfacesAdded", callback)]
+            await device.connect()
+            await device.disconnect()
+            await device.connect()
+            # Wait for all signals emitted so far.
+            await sdbus.DbusObjectManagerInterfaceAsync.new_proxy(
+                "org.bluez", "/", self.client_bus).get_managed_objects()
+            for slot in slots:
+                slot.close()
+        # Connection state changes shall be emitted in order with the
+        # services, and none of the state transitions shall be merged.
+        service, char = f"{path}/service0001", f"{path}/service0001/char0002"
+        self.assertEqual(signals, [
+            "Connected", service, char, "ServicesResolved",
+            "Connected", "ServicesResolved",
+            "Connected", service, char, "ServicesResolved"])
+
+    async def test_notify_fan_out(self):
+        async with await self.start_server("--flag=notify", "--mutate=0.05") as srv:
+            links = [self.get_link(await self.connect(x)) for x in (0, 2)]
+            proxies = [self.get_proxy(x) for x in links]
+            for proxy in proxies:
+                await proxy.StartNotify()
+            await srv.expect("Starting characteristic notification")
+            # Values from the single upstream session shall reach all links.
+            for proxy in proxies:
+                await asyncio.wait_for(self.wait_value(proxy), timeout=1)
+            await proxies[0].StopNotify()
+            await proxies[1].StopNotify()
+            # The session shall be stopped when the last link leaves.
+            output = await srv.expect("Stopping characteristic notification")
+            self.assertNotIn("Starting characteristic notification", output)
+
+    async def test_notify_start_failure(self):
+        async with await self.start_server("--flag=notify", "--fail-notify") as srv:
+            link = self.get_link(await self.connect(0))
+            proxy = self.get_proxy(link)
+            with self.assertRaises(sdbus.DbusFailedError):
+                await proxy.StartNotify()
+            await srv.expect("Starting characteristic notification")
+            # The link shall not be left subscribed after the failure.
+            self.assertEqual(link.client.notify_links, set())
+            self.assertIsNone(link.client.notify_subscription)
+            # The next request shall try to start the session again.
+            with self.assertRaises(sdbus.DbusFailedError):
+                await proxy.StartNotify()
+            await srv.expect("Starting characteristic notification")
+
+    async def test_notify_acquired_closed(self):
+        async with await self.start_server("--flag=notify", "--with-sockets") as srv:
+            link = self.get_link(await self.connect(0))
+            proxy = self.get_proxy(link)
+            await proxy.StartNotify()
+            await srv.expect("Acquiring characteristic notification")
+            self.assertEqual(link.client.notify_links, {link})
+            srv.proc.send_signal(signal.SIGUSR2)
+            await srv.expect("Closed characteristic notification socket")
+            async with asyncio.timeout(1):
+                while link.client.notify_reader is not None:  # noqa: ASYNC110
+                    await asyncio.sleep(0.01)
+            # The link shall not be left subscribed to the closed session.
+            self.assertEqual(link.client.notify_links, set())
+            # The next request shall acquire a new notification socket.
+            await proxy.StartNotify()
+            await srv.expect("Acquiring characteristic notification")
+            self.assertIsNotNone(link.client.notify_reader)
+
+    async def test_reliable_write(self):
+        async with await self.start_server("--flag=read", "--flag=write") as srv:
+            proxy = self.get_proxy(self.get_link(await self.connect(0)))
+            value = bytes(range(50))
+            await proxy.WriteValue(value, {"type": ("s", "reliable")})
+            # The server shall get the whole value with a single write.
+            output = await srv.expect("Writing characteristic: type=reliable")
+            self.assertEqual(await proxy.ReadValue({}), value)
+            output += await srv.expect("Reading characteristic")
+            self.assertEqual(output.count("Writing characteristic"), 1)
+
+    async def test_link_handle_layout(self):
+        # Characteristic with a lower handle than the handle of its service.
+        async with await self.start_server("--flag=read", "--service-handle=10",
+                                           "--char-handle=5"):
+            device = await self.connect(0)
+            link = self.get_link(device)
+            service = f"{device.get_object_path()}/service000a"
+            self.assertEqual(link.get_object_path(), f"{service}/char0005")
+            self.assertEqual(await self.get_proxy(link).Service.get_async(), service)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env -S python3 -X faulthandler
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import gc
+import unittest
+
+import structlog.testing
+
+from bluezoo import events
+
+
+class EventsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # Isolate the tests from subscribers left by other tests.
+        self.subscribers = events._subscribers.copy()
+        events._subscribers.clear()
+
+    def tearDown(self):
+        events._subscribers.clear()
+        events._subscribers.update(self.subscribers)
+
+    def test_subscribe(self):
+        received = []
+        sub = events.subscribe(events.ServiceLost, ":1.1", received.append)
+        events.emit(events.ServiceLost(":1.1"))
+        events.emit(events.ServiceLost(":1.2"))
+        sub.unsubscribe()
+        events.emit(events.ServiceLost(":1.1"))
+        self.assertEqual([x.service for x in received], [":1.1"])
+
+    def test_subscribe_once(self):
+        received = []
+        events.subscribe(events.ServiceLost, ":1.1", received.append, once=True)
+        events.emit(events.ServiceLost(":1.1"))
+        events.emit(events.ServiceLost(":1.1"))
+        self.assertEqual(len(received), 1)
+
+    def test_subscribe_error(self):
+        received = []
+
+        def callback(event):
+            raise RuntimeError
+
+        events.subscribe(events.ServiceLost, ":1.1", callback)
+        events.subscribe(events.ServiceLost, ":1.1", received.append)
+        with structlog.testing.capture_logs() as logs:
+            events.emit(events.ServiceLost(":1.1"))
+        # Failing callback shall not stop the delivery to other subscribers.
+        self.assertEqual(len(received), 1)
+        self.assertEqual([x["event"] for x in logs], ["Error in ServiceLost callback"])
+
+    def test_subscribe_async(self):
+        received = []
+
+        async def callback(event: events.PropertiesChanged):
+            await asyncio.sleep(0)
+            received.append(event.properties)
+
+        async def main():
+            obj = object()
+            sub = events.subscribe(events.PropertiesChanged, id(obj), callback)
+            events.emit(events.PropertiesChanged(obj, {"Value": b"\x01"}))
+            self.assertEqual(received, [])
+            await asyncio.sleep(0.01)
+            sub.unsubscribe()
+
+        asyncio.run(main())
+        self.assertEqual(received, [{"Value": b"\x01"}])
+
+    def test_subscribe_weak(self):
+
+        class Subscriber:
+            received = 0
+
+            def callback(self, event):
+                Subscriber.received += 1
+
+        obj = Subscriber()
+        events.subscribe(events.ServiceLost, ":1.1", obj.callback, weak=True)
+        events.emit(events.ServiceLost(":1.1"))
+        del obj
+        gc.collect()
+        events.emit(events.ServiceLost(":1.1"))
+        self.assertEqual(Subscriber.received, 1)
+        # Subscriber of the collected object is dropped.
+        self.assertNotIn((events.ServiceLost, ":1.1"), events._subscribers)
+
+
+if __name__ == "__main__":
+    unittest.main()
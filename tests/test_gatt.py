@@ -0,0 +1,273 @@
+#!/usr/bin/env -S python3 -X faulthandler
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import contextlib
+import os
+import socket
+import unittest
+
+from bluezoo.exceptions import (DBusBluezFailedError, DBusBluezInvalidOffsetError,
+                                DBusBluezInvalidValueLengthError)
+from bluezoo.gatt.handles import GattAttributeTable, GattHandleAllocator
+from bluezoo.gatt.procedures import GattLongRead, GattPreparedWrites
+from bluezoo.gatt.relay import GattSocketReader, GattSocketRelay, GattSocketWriter
+
+
+class GattHandlesTestCase(unittest.TestCase):
+
+    def test_allocator_reserve(self):
+        handles = GattHandleAllocator()
+        self.assertEqual(handles.reserve(3), range(1, 4))
+        handles.claim(6)
+        # The range shall fit in the gap before the claimed handle.
+        self.assertEqual(handles.reserve(2), range(4, 6))
+        self.assertEqual(handles.reserve(2), range(7, 9))
+        self.assertEqual(len(handles), 8)
+
+    def test_allocator_release(self):
+        handles = GattHandleAllocator()
+        handles.reserve(10)
+        handles.release(range(3, 6))
+        self.assertNotIn(4, handles)
+        # Released handles shall be reused.
+        self.assertEqual(handles.allocate(), 3)
+        self.assertEqual(handles.reserve(3), range(11, 14))
+        self.assertEqual(handles.reserve(2), range(4, 6))
+
+    def test_allocator_invalid(self):
+        handles = GattHandleAllocator()
+        handles.claim(0xFFFF)
+        with self.assertRaises(ValueError):
+            handles.claim(0xFFFF)
+        with self.assertRaises(ValueError):
+            handles.claim(0)
+        with self.assertRaises(ValueError):
+            handles.reserve(0xFFFF)
+
+    def test_attribute_table(self):
+        table = GattAttributeTable()
+        for handle in (5, 1, 3, 2):
+            table.add(handle, f"attr{handle}")
+        self.assertEqual(list(table), ["attr1", "attr2", "attr3", "attr5"])
+        self.assertEqual(list(table.find(2, 4)), ["attr2", "attr3"])
+        self.assertEqual(table.remove(3), "attr3")
+        self.assertEqual(table.handles(), [1, 2, 5])
+        self.assertIsNone(table.get(3))
+        with self.assertRaises(ValueError):
+            table.add(5, "attr5")
+
+
+class GattLongReadTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.value = bytes(range(100))
+        self.fetches = 0
+
+    async def fetch(self, offset=0):
+        self.fetches += 1
+        return self.value[offset:]
+
+    async def test_read(self):
+        long_read = GattLongRead()
+        value = b""
+        while len(value) < len(self.value):
+            value += (await long_read.read("client", len(value), 23, self.fetch))[:22]
+        self.assertEqual(value, self.value)
+        # The value shall be fetched once, and the buffer shall be discarded.
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(long_read.buffers, {})
+
+    async def test_read_short(self):
+        long_read = GattLongRead()
+        self.value = b"short"
+        self.assertEqual(await long_read.read("client", 0, 23, self.fetch), b"short")
+        self.assertEqual(long_read.buffers, {})
+
+    async def test_read_discard(self):
+        long_read = GattLongRead()
+        await long_read.read("client", 0, 23, self.fetch)
+        long_read.discard()
+        # Without the procedure, the read shall be forwarded to the server.
+        self.assertEqual(await long_read.read("client", 22, 23, lambda: self.fetch(22)),
+                         self.value[22:])
+        self.assertEqual(self.fetches, 2)
+
+
+class GattPreparedWritesTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_write(self):
+        writes = GattPreparedWrites()
+        values = []
+
+        async def write(value):
+            values.append(value)
+
+        value = bytes(range(100))
+        await writes.write("a", 10, value, 23, write)
+        # The value shall be written with a single upstream call.
+        self.assertEqual(values, [value])
+        self.assertEqual(len(writes), 0)
+        self.assertEqual(writes.queue_length_max, 6)
+        self.assertEqual(writes.commit_latency.count, 1)
+        await writes.write("a", 0, b"", 23, write)
+        self.assertEqual(values, [value, b""])
+
+    async def test_write_too_long(self):
+        writes = GattPreparedWrites()
+        values = []
+
+        async def write(value):
+            values.append(value)
+
+        with self.assertRaises(DBusBluezInvalidValueLengthError):
+            await writes.write("a", 500, bytes(20), 23, write)
+        # Nothing shall be written when any fragment is invalid.
+        self.assertEqual(values, [])
+        self.assertEqual(len(writes), 0)
+
+    async def test_execute(self):
+        writes = GattPreparedWrites()
+        values = {}
+
+        def writer(name):
+            async def write(value):
+                values[name] = value
+            return write
+
+        writes.prepare("a", 2, b"Hello ", writer("a"))
+        writes.prepare("b", 0, b"1234", writer("b"))
+        writes.prepare("a", 8, b"World", writer("a"))
+        self.assertEqual(values, {})
+        await writes.execute()
+        self.assertEqual(values, {"a": b"Hello World", "b": b"1234"})
+        self.assertEqual(len(writes), 0)
+
+    async def test_execute_invalid_offset(self):
+        writes = GattPreparedWrites()
+        values = []
+
+        async def write(value):
+            values.append(value)
+
+        writes.prepare("a", 0, b"12", write)
+        writes.prepare("b", 4, b"56", write)
+        writes.prepare("b", 8, b"78", write)
+        with self.assertRaises(DBusBluezInvalidOffsetError):
+            await writes.execute()
+        # Nothing shall be written when any fragment is invalid.
+        self.assertEqual(values, [])
+        self.assertEqual(len(writes), 0)
+
+    async def test_prepare_queue_full(self):
+        writes = GattPreparedWrites()
+
+        async def write(value):
+            pass
+
+        for i in range(writes.QUEUE_SIZE_MAX):
+            writes.prepare("a", i, b"x", write)
+        with self.assertRaises(DBusBluezFailedError):
+            writes.prepare("a", writes.QUEUE_SIZE_MAX, b"x", write)
+        writes.cancel()
+        self.assertEqual(len(writes), 0)
+
+
+class GattSocketRelayTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server, upstream = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.closed = asyncio.Event()
+        self.relay = GattSocketRelay(upstream.fileno(), 23, self.closed.set)
+        # Duplicate the descriptor the same way as the D-Bus library does.
+        self.client = socket.socket(fileno=os.dup(self.relay.get_remote_fd()))
+        # The relay owns a duplicate of the server socket.
+        upstream.close()
+
+    async def asyncTearDown(self):
+        self.relay.close()
+        self.server.close()
+        self.client.close()
+
+    async def recv(self, sock: socket.socket):
+        loop = asyncio.get_running_loop()
+        sock.setblocking(False)
+        return await asyncio.wait_for(loop.sock_recv(sock, 512), timeout=1)
+
+    async def test_relay_packets(self):
+        self.server.send(b"\x01\x02")
+        self.server.send(b"\x03")
+        self.assertEqual(await self.recv(self.client), b"\x01\x02")
+        self.assertEqual(await self.recv(self.client), b"\x03")
+        # Verify relaying in the opposite direction.
+        self.client.send(b"\x01")
+        self.assertEqual(await self.recv(self.server), b"\x01")
+
+    async def test_relay_close(self):
+        # Wait for the loop to release our copy of the remote socket.
+        await asyncio.sleep(0)
+        self.client.close()
+        self.assertEqual(await self.recv(self.server), b"")
+        self.assertTrue(self.relay.closed)
+        self.assertTrue(self.closed.is_set())
+
+
+class GattSocketReaderTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_reader_batch(self):
+        server, upstream = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        batches = []
+        closed = asyncio.Event()
+        reader = GattSocketReader(upstream.fileno(), 23, batches.append, closed.set)
+        upstream.close()
+
+        for i in range(5):
+            server.send(bytes([i]))
+        server.close()
+
+        await asyncio.wait_for(closed.wait(), timeout=1)
+        # All pending packets shall be drained on a single wakeup.
+        self.assertEqual(batches, [[b"\x00", b"\x01", b"\x02", b"\x03", b"\x04"]])
+        self.assertEqual(reader.queue_depth_max, 5)
+        self.assertTrue(reader.closed)
+
+
+class GattSocketWriterTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server, upstream = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.writer = GattSocketWriter(upstream.fileno(), 23)
+        upstream.close()
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        self.server.close()
+
+    async def test_writer_backpressure(self):
+        self.writer.QUEUE_SIZE_MAX = 4
+        self.writer.STALL_TIMEOUT = 0.1
+        # Fill the socket buffer and the queue - the server is not reading.
+        with self.assertRaises(TimeoutError):
+            while True:
+                await self.writer.write(bytes(23))
+        self.assertEqual(len(self.writer.queue), 4)
+        self.assertEqual(self.writer.stalls, 1)
+
+        # Drain the socket on the server side, so the queue can be flushed.
+        self.server.setblocking(False)
+        with contextlib.suppress(BlockingIOError):
+            while True:
+                self.server.recv(23)
+        await self.writer.write(b"\x01")
+        self.assertGreater(self.writer.stall_time, 0)
+
+    async def test_writer_closed(self):
+        self.server.close()
+        with self.assertRaises(ConnectionError):
+            await self.writer.write(b"\x01")
+        self.assertTrue(self.writer.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,7 @@ import os
 import unittest
 
 from bluezoo import bluezoo
+from bluezoo.device import Device
 
 
 async def client(*args):
@@ -67,9 +68,30 @@ class BlueZooManagerTestCase(unittest.IsolatedAsyncioTestCase):
         self.assertIn(b"Controller 00:00:00:22:22:22", output)
         self.assertIn(b"Controller 00:00:00:00:00:55", output)
 
+    async def test_add_adapter_lower_case(self):
+
+        out = await manager("AddAdapter", "byte:5", "string:00:00:00:aa:bb:cc")
+        self.assertIn(b'object path "/org/bluez/hci5"', out[0])
+
+        # The address shall be reported in the canonical (upper-case) form.
+        proc = await asyncio.create_subprocess_exec(
+            "dbus-send", "--system", "--print-reply", "--dest=org.bluez", "/org/bluez/hci5",
+            "org.freedesktop.DBus.Properties.Get",
+            "string:org.bluez.Adapter1", "string:Address",
+            stdout=asyncio.subprocess.PIPE)
+        output, _ = await proc.communicate()
+        self.assertIn(b'string "00:00:00:AA:BB:CC"', output)
+
+        adapter = bluezoo.startup.service.adapters[0]
+        device = Device(bluezoo.startup.service.adapters[5])
+        await adapter.add_device(device)
+        self.assertEqual(device.get_object_path(), "/org/bluez/hci0/dev_00_00_00_AA_BB_CC")
+
     async def test_add_adapter_invalid(self):
         out = await manager("AddAdapter", "byte:1", "string:00:00:00:11:11:11")
         self.assertIn(b"org.bluezoo.Error.AlreadyExists", out[1])
+        out = await manager("AddAdapter", "byte:5", "string:00:00:00:00:00:5")
+        self.assertIn(b"org.bluezoo.Error.InvalidArguments", out[1])
 
     async def test_remove_adapter(self):
 
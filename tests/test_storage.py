@@ -0,0 +1,59 @@
+#!/usr/bin/env -S python3 -X faulthandler
+# SPDX-FileCopyrightText: 2025 BlueZoo developers
+# SPDX-License-Identifier: GPL-2.0-only
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from bluezoo.storage import DeviceInfo, Storage
+
+
+class StorageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = Storage(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_devices(self):
+        adapter = "00:00:00:11:11:11"
+
+        async def save():
+            self.storage.save_device(adapter, "00:00:00:22:22:22", DeviceInfo("A", paired=True))
+            self.storage.save_device(adapter, "00:00:00:33:33:33", DeviceInfo("B", trusted=True))
+            self.storage.save_device(adapter, "00:00:00:33:33:33", None)
+            # Pending changes shall be visible before they are written.
+            devices = await self.storage.load_devices(adapter)
+            self.assertEqual(list(devices), ["00:00:00:22:22:22"])
+
+        async def flush():
+            await self.storage.flush()
+
+        asyncio.run(save())
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, adapter)))
+        asyncio.run(flush())
+        devices = asyncio.run(Storage(self.tmpdir.name).load_devices(adapter))
+        self.assertEqual(devices, {"00:00:00:22:22:22": DeviceInfo("A", paired=True)})
+
+    def test_devices_flush(self):
+        adapter = "00:00:00:11:11:11"
+
+        async def main():
+            self.storage.save_device(adapter, "00:00:00:22:22:22", DeviceInfo("A"))
+            load = asyncio.create_task(self.storage.load_devices(adapter))
+            await asyncio.sleep(0)
+            # Flush pending changes while the storage is being read.
+            await self.storage.flush()
+            return await load
+
+        # Device written in the meantime shall not be lost.
+        self.assertEqual(asyncio.run(main()), {"00:00:00:22:22:22": DeviceInfo("A")})
+
+
+
+if __name__ == "__main__":
+    unittest.main()
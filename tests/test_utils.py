@@ -2,19 +2,56 @@
 # SPDX-FileCopyrightText: 2025 BlueZoo developers
 # SPDX-License-Identifier: GPL-2.0-only
 
+import asyncio
+import os
+import time
 import unittest
+from collections import Counter
+from typing import ClassVar
 
-from bluezoo.utils import BluetoothAddress, BluetoothClass, BluetoothUUID
+import sdbus
+import structlog.testing
+from sdbus_async.dbus_daemon import FreedesktopDbus
+
+from bluezoo import events
+from bluezoo.exceptions import DBusBluezFailedError
+from bluezoo.utils import (BluetoothAddress, BluetoothClass, BluetoothUUID,
+                           DBusClientCircuitBreaker, DBusClientMixin, DBusServerMixin,
+                           DBusServiceWatcher, Latency, PropertiesChangedCoalescer,
+                           PropertiesSnapshot, map_with_concurrency, setup_default_bus)
 
 
 class UtilsTestCase(unittest.TestCase):
 
     def test_address(self):
-        self.assertEqual(BluetoothAddress("12:34:56:78:90:AB"), "12:34:56:78:90:AB")
+        address = BluetoothAddress("12:34:56:78:90:ab")
+        self.assertEqual(str(address), "12:34:56:78:90:AB")
+        self.assertEqual(address.path, "12_34_56_78_90_AB")
+        self.assertEqual(address, BluetoothAddress(0x1234567890AB))
+        self.assertIs(BluetoothAddress(address), address)
+        # Addresses are compared with other addresses only.
+        self.assertNotEqual(address, "12:34:56:78:90:AB")
+
+    def test_address_order(self):
+        self.assertLess(BluetoothAddress("00:00:00:00:00:FF"), BluetoothAddress(0x100))
+        self.assertEqual(len({BluetoothAddress(1), BluetoothAddress("00:00:00:00:00:01")}), 1)
+
+    def test_address_range(self):
+        addresses = list(BluetoothAddress.range("00:00:00:00:00:FE", 3))
+        self.assertEqual([str(x) for x in addresses],
+                         ["00:00:00:00:00:FE", "00:00:00:00:00:FF", "00:00:00:00:01:00"])
+        with self.assertRaises(ValueError):
+            list(BluetoothAddress.range("FF:FF:FF:FF:FF:FF", 2))
 
     def test_address_invalid(self):
         with self.assertRaises(ValueError):
             BluetoothAddress("1234567890AB")
+        with self.assertRaises(ValueError):
+            BluetoothAddress(1 << 48)
+        with self.assertRaises(TypeError):
+            BluetoothAddress(1.5)
+        with self.assertRaises(TypeError):
+            BluetoothAddress(True)
 
     def test_class(self):
         bt_class = BluetoothClass(1, 2, 3)
@@ -49,6 +86,226 @@ class UtilsTestCase(unittest.TestCase):
         bt_class = BluetoothClass(BluetoothClass.Major.Phone)
         self.assertEqual(bt_class.icon, "phone")
 
+    def test_circuit_breaker(self):
+        breaker = DBusClientCircuitBreaker()
+        for _ in range(breaker.FAILURES_MAX - 1):
+            breaker.failure()
+        self.assertFalse(breaker.is_open)
+        breaker.failure()
+        self.assertTrue(breaker.is_open)
+        # After the reset timeout, one trial call shall be let through.
+        breaker.opened -= breaker.RESET_TIMEOUT
+        self.assertFalse(breaker.is_open)
+        # Other calls shall fail while the trial call is in flight.
+        self.assertTrue(breaker.is_open)
+        breaker.failure()
+        self.assertTrue(breaker.is_open)
+
+    def test_call_with_deadline(self):
+
+        class Client(DBusClientMixin):
+            CALL_TIMEOUT = 0.01
+            circuit_breakers: ClassVar[dict] = {}
+            deadlines_exceeded: ClassVar[Counter] = Counter()
+
+            def __init__(self):
+                pass
+
+            def get_client(self):
+                return ":1.1"
+
+        client = Client()
+        calls = 0
+
+        async def call(delay: float):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(delay)
+            return delay
+
+        async def main():
+            for _ in range(DBusClientCircuitBreaker.FAILURES_MAX):
+                with self.assertRaises(DBusBluezFailedError):
+                    await client.call_with_deadline("Call", call, 1)
+            self.assertEqual(client.deadlines_exceeded["Client.Call"], 3)
+            # Calls shall fail fast with the breaker open.
+            with self.assertRaises(DBusBluezFailedError):
+                await client.call_with_deadline("Call", call, 0)
+            self.assertEqual(calls, 3)
+            # Only one trial call shall be let through after the reset timeout.
+            client.circuit_breakers[":1.1"].opened -= DBusClientCircuitBreaker.RESET_TIMEOUT
+            trial = asyncio.create_task(client.call_with_deadline("Call", call, 0.005))
+            await asyncio.sleep(0)
+            with self.assertRaises(DBusBluezFailedError):
+                await client.call_with_deadline("Call", call, 0)
+            # Successful trial call shall close the breaker.
+            self.assertEqual(await trial, 0.005)
+            self.assertEqual(client.circuit_breakers, {})
+            self.assertEqual(await client.call_with_deadline("Call", call, 0), 0)
+            self.assertEqual(calls, 5)
+
+        asyncio.run(main())
+
+    def test_call_with_deadline_per_method(self):
+
+        class Client(DBusClientMixin):
+            CALL_TIMEOUT = 0.01
+            CALL_TIMEOUTS: ClassVar[dict] = {"Slow": 1}
+            circuit_breakers: ClassVar[dict] = {}
+            deadlines_exceeded: ClassVar[Counter] = Counter()
+
+            def __init__(self):
+                pass
+
+            def get_client(self):
+                return ":1.1"
+
+        client = Client()
+
+        async def main():
+            # The method shall be given its own deadline.
+            self.assertIsNone(await client.call_with_deadline("Slow", asyncio.sleep, 0.05))
+            with self.assertRaises(DBusBluezFailedError):
+                await client.call_with_deadline("Call", asyncio.sleep, 0.05)
+            self.assertEqual(client.deadlines_exceeded, {"Client.Call": 1})
+
+        asyncio.run(main())
+
+    def test_call_with_deadline_trial_error(self):
+
+        class Client(DBusClientMixin):
+            circuit_breakers: ClassVar[dict] = {}
+            deadlines_exceeded: ClassVar[Counter] = Counter()
+
+            def __init__(self):
+                pass
+
+            def get_client(self):
+                return ":1.1"
+
+        client = Client()
+        breaker = client.circuit_breakers[":1.1"] = DBusClientCircuitBreaker()
+        breaker.opened = time.monotonic() - breaker.RESET_TIMEOUT
+
+        async def fail():
+            raise RuntimeError
+
+        async def main():
+            with self.assertRaises(RuntimeError):
+                await client.call_with_deadline("Call", fail)
+            # Failed trial call shall not leave the breaker rejecting all calls.
+            self.assertFalse(breaker.trial)
+            self.assertIsNone(await client.call_with_deadline("Call", asyncio.sleep, 0))
+            self.assertEqual(client.circuit_breakers, {})
+
+        asyncio.run(main())
+
+    def test_latency(self):
+        latency = Latency()
+        self.assertEqual(latency.mean, 0)
+        latency.add(0.1)
+        latency.add(0.3)
+        self.assertEqual(latency.count, 2)
+        self.assertAlmostEqual(latency.mean, 0.2)
+        self.assertEqual(latency.max, 0.3)
+
+    def test_map_with_concurrency(self):
+        running, peak = 0, 0
+
+        async def func(x):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return x * 2
+
+        results = asyncio.run(map_with_concurrency(func, range(10), 3))
+        self.assertEqual(results, [x * 2 for x in range(10)])
+        self.assertEqual(peak, 3)
+
+    def test_map_with_concurrency_error(self):
+
+        async def func(x):
+            if x == 5:
+                raise ValueError(x)
+            await asyncio.sleep(0)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(map_with_concurrency(func, range(10), 3))
+
+    def test_properties_changed_coalescer(self):
+        signals = []
+
+        class Object:
+            class properties_changed:
+                emit = signals.append
+
+        async def main():
+            coalescer = PropertiesChangedCoalescer()
+            obj1, obj2 = Object(), Object()
+            coalescer.add(obj1, "org.bluez.Device1", "Connected", "b", True)
+            coalescer.add(obj2, "org.bluez.Device1", "Connected", "b", True)
+            coalescer.add(obj1, "org.bluez.Device1", "ServicesResolved", "b", True)
+            coalescer.add(obj1, "org.bluez.Device1", "Connected", "b", False)
+            self.assertEqual(signals, [])
+            await asyncio.sleep(0)
+            coalescer.add(obj1, "org.bluez.Device1", "Paired", "b", True)
+            coalescer.flush(obj1)
+
+        asyncio.run(main())
+        self.assertEqual(signals, [
+            ("org.bluez.Device1",
+             {"Connected": ("b", False), "ServicesResolved": ("b", True)}, []),
+            ("org.bluez.Device1", {"Connected": ("b", True)}, []),
+            ("org.bluez.Device1", {"Paired": ("b", True)}, []),
+        ])
+
+    def test_properties_changed_coalescer_error(self):
+
+        class Object:
+            class properties_changed:
+                def emit(signal):
+                    raise RuntimeError(signal)
+
+        async def main():
+            coalescer = PropertiesChangedCoalescer()
+            coalescer.add(Object(), "org.bluez.Device1", "Connected", "b", True)
+            coalescer.flush()
+
+        with structlog.testing.capture_logs() as logs:
+            asyncio.run(main())
+        # Emit failures shall not be swallowed silently.
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0]["log_level"], "error")
+        self.assertTrue(logs[0]["exc_info"])
+
+    def test_properties_snapshot(self):
+        calls = []
+
+        class Object:
+            connected = False
+
+        class Property:
+            def property_getter(self, obj):
+                calls.append(obj)
+                return obj.connected
+
+        snapshot = PropertiesSnapshot()
+        obj, source, prop = Object(), Object(), Property()
+        snapshot.add_source(obj, source)
+        self.assertFalse(snapshot.get(obj, prop))
+        obj.connected = True
+        # The value is served from the snapshot.
+        self.assertFalse(snapshot.get(obj, prop))
+        self.assertEqual(len(calls), 1)
+        snapshot.invalidate(obj)
+        self.assertTrue(snapshot.get(obj, prop))
+        obj.connected = False
+        snapshot.invalidate_source(source)
+        self.assertFalse(snapshot.get(obj, prop))
+        self.assertEqual(len(calls), 3)
+
     def test_uuid(self):
         uuid = BluetoothUUID("12345678-0000-0000-0000-000000000000")
         self.assertEqual(uuid, "12345678-0000-0000-0000-000000000000")
@@ -57,10 +314,173 @@ class UtilsTestCase(unittest.TestCase):
         uuid = BluetoothUUID("0x1234")
         self.assertEqual(uuid, "00001234-0000-1000-8000-00805f9b34fb")
 
+    def test_uuid_interned(self):
+        uuid = BluetoothUUID("0x180F")
+        self.assertIs(BluetoothUUID("0x180F"), uuid)
+        # Already normalized UUID is returned as is.
+        self.assertIs(BluetoothUUID(uuid), uuid)
+        self.assertIs(BluetoothUUID(str(uuid)), BluetoothUUID(str(uuid)))
+
     def test_uuid_invalid(self):
         with self.assertRaises(ValueError):
             BluetoothUUID("12345678-0000-0000")
 
 
+class DBusTestCase(unittest.IsolatedAsyncioTestCase):
+    """Test case with a private D-Bus session set as the default bus."""
+
+    async def asyncSetUp(self):
+        # Start a private D-Bus session and get the address.
+        self._bus = await asyncio.create_subprocess_exec(
+            "dbus-daemon", "--session", "--print-address",
+            stdout=asyncio.subprocess.PIPE)
+        assert self._bus.stdout is not None, "D-Bus daemon process's stdout is None"
+        address = await self._bus.stdout.readline()
+        os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = address.strip().decode("utf-8")
+        self.bus = setup_default_bus("system")
+
+    async def asyncTearDown(self):
+        self.bus.close()
+        self._bus.terminate()
+        await self._bus.wait()
+        # Make sure that all tasks were properly handled. The list shall
+        # contain the asyncTearDown() task only - we are in it right now.
+        self.assertEqual(len(asyncio.all_tasks()), 1)
+
+
+class FailingInterface(sdbus.DbusInterfaceCommonAsync, interface_name="org.bluezoo.Test1"):
+
+    @sdbus.dbus_method_async(input_signature="b")
+    async def Call(self, dbus_error: bool) -> None:
+        raise NotImplementedError
+
+    @sdbus.dbus_property_async(property_signature="b")
+    def Property(self) -> bool:
+        raise NotImplementedError
+
+
+class DBusServerMixinTestCase(DBusTestCase):
+
+    class Server(DBusServerMixin, FailingInterface):
+
+        def __init__(self):
+            super().__init__()
+            self.dbus_error = False
+
+        def fail(self, name: str):
+            if self.dbus_error:
+                raise sdbus.DbusFailedError(name)
+            raise RuntimeError(name)
+
+        @sdbus.dbus_method_async_override()
+        async def Call(self, dbus_error: bool) -> None:
+            self.dbus_error = dbus_error
+            self.fail("Call")
+
+        @sdbus.dbus_property_async_override()
+        def Property(self) -> bool:
+            self.fail("Property")
+            return False
+
+    async def test_errors_logged(self):
+        server = self.Server()
+        handle = server.export_to_dbus("/test")
+        client_bus = sdbus.sd_bus_open_system()
+        await self.bus.request_name_async("org.bluezoo.Test", 0)
+        proxy = FailingInterface.new_proxy("org.bluezoo.Test", "/test", client_bus)
+        try:
+            with structlog.testing.capture_logs() as logs:
+                with self.assertRaises(RuntimeError):
+                    await proxy.Call(False)
+                with self.assertRaises(RuntimeError):
+                    await proxy.Property.get_async()
+            # Errors other than D-Bus errors shall be logged.
+            self.assertEqual([(x["event"], x["log_level"]) for x in logs], [
+                ("Error in D-Bus method Call", "error"),
+                ("Error in D-Bus property Property", "error")])
+            with structlog.testing.capture_logs() as logs:
+                with self.assertRaises(sdbus.DbusFailedError):
+                    await proxy.Call(True)
+                with self.assertRaises(sdbus.DbusFailedError):
+                    await proxy.Property.get_async()
+            self.assertEqual(logs, [])
+        finally:
+            client_bus.close()
+            handle.stop()
+
+
+class DBusServiceWatcherTestCase(DBusTestCase):
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.watcher = DBusServiceWatcher()
+        self.watcher.start()
+
+    async def asyncTearDown(self):
+        await self.watcher.stop()
+        await super().asyncTearDown()
+
+    async def connect(self) -> tuple[sdbus.SdBus, str]:
+        """Connect new client to the bus and return its unique name."""
+        bus = sdbus.sd_bus_open_system()
+        await bus.request_name_async("org.bluezoo.Test", 0)
+        return bus, await FreedesktopDbus(self.bus).get_name_owner("org.bluezoo.Test")
+
+    async def wait_updates(self):
+        """Wait for pending updates of match rules."""
+        await asyncio.gather(*self.watcher._updates)
+
+    def subscribe(self, service: str) -> asyncio.Event:
+        lost = asyncio.Event()
+        events.subscribe(events.ServiceLost, service, lambda _: lost.set(), once=True)
+        return lost
+
+    async def test_service_lost(self):
+        bus, service = await self.connect()
+        lost = self.subscribe(service)
+        self.watcher.watch(service)
+        await self.wait_updates()
+        bus.close()
+        await asyncio.wait_for(lost.wait(), timeout=1)
+        self.assertNotIn(service, self.watcher.watched)
+        await self.wait_updates()
+
+    async def test_unwatch(self):
+        bus, service = await self.connect()
+        lost = self.subscribe(service)
+        self.watcher.watch(service)
+        self.watcher.watch(service)
+        self.watcher.unwatch(service)
+        self.assertEqual(self.watcher.watched[service], 1)
+        self.watcher.unwatch(service)
+        self.assertNotIn(service, self.watcher.watched)
+        await self.wait_updates()
+        bus.close()
+        # Services which are no longer watched shall not be reported.
+        await FreedesktopDbus(self.bus).get_id()
+        await asyncio.sleep(0.1)
+        self.assertFalse(lost.is_set())
+
+    async def test_service_lost_before_match(self):
+        bus, service = await self.connect()
+        lost = self.subscribe(service)
+        bus.close()
+        await FreedesktopDbus(self.bus).get_id()
+        # The service has disconnected before the match rule was added.
+        self.watcher.watch(service)
+        await asyncio.wait_for(lost.wait(), timeout=1)
+        self.assertNotIn(service, self.watcher.watched)
+        await self.wait_updates()
+
+    async def test_stop_not_ready(self):
+        watcher = DBusServiceWatcher()
+        watcher.start()
+        watcher.watch(":1.42")
+        watcher.unwatch(":1.42")
+        # Pending updates shall be cancelled with the watcher.
+        await watcher.stop()
+        self.assertEqual(watcher._updates, set())
+
+
 if __name__ == "__main__":
     unittest.main()